@@ -0,0 +1,23 @@
+"""add owner user_id to runs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Batch mode lets SQLite, which cannot ALTER constraints, recreate the table instead
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.add_column(
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', name='fk_runs_user_id'), nullable=True),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('runs') as batch_op:
+        batch_op.drop_constraint('fk_runs_user_id', type_='foreignkey')
+        batch_op.drop_column('user_id')
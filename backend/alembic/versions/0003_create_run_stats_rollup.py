@@ -0,0 +1,49 @@
+"""create run_stats_rollup and backfill it from runs"""
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rollup = op.create_table(
+        'run_stats_rollup',
+        sa.Column('period_type', sa.String(), primary_key=True),
+        sa.Column('period_key', sa.String(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total_distance', sa.Float(), nullable=False),
+    )
+
+    runs = sa.table('runs', sa.column('created_at', sa.DateTime()), sa.column('distance', sa.Float()))
+    day = sa.func.date(runs.c.created_at, type_=sa.Date)
+    daily = op.get_bind().execute(
+        sa.select(day, sa.func.count(), sa.func.coalesce(sa.func.sum(runs.c.distance), 0.0)).group_by(day)
+    )
+    totals = {}
+    for d, count, distance in daily:
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        iso = d.isocalendar()
+        for key in (
+            ('weekly', f"{iso.year}-W{iso.week:02d}"),
+            ('monthly', f"{d.year}-{d.month:02d}"),
+            ('yearly', str(d.year)),
+        ):
+            total = totals.setdefault(key, [0, 0.0])
+            total[0] += count
+            total[1] += float(distance)
+    if totals:
+        op.bulk_insert(rollup, [
+            {'period_type': period, 'period_key': key, 'count': count, 'total_distance': distance}
+            for (period, key), (count, distance) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('run_stats_rollup')
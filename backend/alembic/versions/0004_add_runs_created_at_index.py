@@ -0,0 +1,16 @@
+"""index runs.created_at for date-range stats queries"""
+
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_runs_created_at', 'runs', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_runs_created_at', table_name='runs')
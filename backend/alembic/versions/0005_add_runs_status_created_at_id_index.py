@@ -0,0 +1,16 @@
+"""composite index for newest-first run listings and keyset pagination"""
+
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_runs_status_created_at_id', 'runs', ['status', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_runs_status_created_at_id', table_name='runs')
@@ -0,0 +1,100 @@
+"""user-scoped run indexes and a per-user run_stats_rollup"""
+
+import os
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _create_rollup(with_user: bool):
+    columns = [
+        sa.Column('period_type', sa.String(), primary_key=True),
+        sa.Column('period_key', sa.String(), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total_distance', sa.Float(), nullable=False),
+    ]
+    if with_user:
+        columns.insert(0, sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True))
+    return op.create_table('run_stats_rollup', *columns)
+
+
+def _backfill(rollup, with_user: bool):
+    runs = sa.table(
+        'runs',
+        sa.column('user_id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('distance', sa.Float()),
+    )
+    created_at = runs.c.created_at
+    if op.get_bind().dialect.name == 'postgresql':
+        # Days in UTC, as the app's rollup updates count them, not in the session time zone
+        created_at = sa.func.timezone('UTC', created_at)
+    day = sa.func.date(created_at, type_=sa.Date)
+    group_by = [runs.c.user_id, day] if with_user else [day]
+    stmt = sa.select(*group_by, sa.func.count(), sa.func.coalesce(sa.func.sum(runs.c.distance), 0.0))
+    if with_user:
+        # Runs without an owner are visible to nobody
+        stmt = stmt.where(runs.c.user_id.isnot(None))
+    totals = {}
+    for row in op.get_bind().execute(stmt.group_by(*group_by)):
+        *owner, d, count, distance = row
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        iso = d.isocalendar()
+        for key in (
+            ('weekly', f"{iso.year}-W{iso.week:02d}"),
+            ('monthly', f"{d.year}-{d.month:02d}"),
+            ('yearly', str(d.year)),
+        ):
+            total = totals.setdefault((*owner, *key), [0, 0.0])
+            total[0] += count
+            total[1] += float(distance)
+    if totals:
+        names = (['user_id'] if with_user else []) + ['period_type', 'period_key']
+        op.bulk_insert(rollup, [
+            {**dict(zip(names, key)), 'count': count, 'total_distance': distance}
+            for key, (count, distance) in totals.items()
+        ])
+
+
+def _assign_unowned_runs():
+    """Give runs from before ownership an owner, so they stay visible.
+
+    The owner is ``LEGACY_RUNS_OWNER_ID`` if set, otherwise the only user when
+    there is exactly one.  Runs left without an owner can be claimed later with
+    ``python -m app.claim_unowned_runs <email>``.
+    """
+    bind = op.get_bind()
+    users = sa.table('users', sa.column('id', sa.Integer()))
+    runs = sa.table('runs', sa.column('user_id', sa.Integer()))
+    owner_id = os.getenv('LEGACY_RUNS_OWNER_ID')
+    if owner_id:
+        owner_id = int(owner_id)
+    else:
+        user_ids = bind.execute(sa.select(users.c.id).limit(2)).scalars().all()
+        if len(user_ids) != 1:
+            return
+        owner_id = user_ids[0]
+    bind.execute(runs.update().where(runs.c.user_id.is_(None)).values(user_id=owner_id))
+
+
+def upgrade():
+    op.create_index('ix_runs_user_id_created_at_id', 'runs', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_runs_user_id_status_created_at_id', 'runs', ['user_id', 'status', 'created_at', 'id'])
+    _assign_unowned_runs()
+    # The rollup is derived data: rebuild it keyed by owner
+    op.drop_table('run_stats_rollup')
+    _backfill(_create_rollup(with_user=True), with_user=True)
+
+
+def downgrade():
+    op.drop_table('run_stats_rollup')
+    _backfill(_create_rollup(with_user=False), with_user=False)
+    op.drop_index('ix_runs_user_id_status_created_at_id', table_name='runs')
+    op.drop_index('ix_runs_user_id_created_at_id', table_name='runs')
@@ -0,0 +1,25 @@
+"""create run_versions and seed it for every run owner"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    versions = op.create_table(
+        'run_versions',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    runs = sa.table('runs', sa.column('user_id', sa.Integer()))
+    owners = sa.select(runs.c.user_id, sa.literal(1), sa.func.now()).where(runs.c.user_id.isnot(None)).distinct()
+    op.execute(versions.insert().from_select(['user_id', 'version', 'updated_at'], owners))
+
+
+def downgrade():
+    op.drop_table('run_versions')
@@ -0,0 +1,25 @@
+"""keep one Strava cache row per user and enforce it with unique indexes"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+CACHE_TABLES = ('strava_heart_rate_zone_cache', 'strava_stats_cache', 'strava_activities_cache')
+
+
+def upgrade():
+    for name in CACHE_TABLES:
+        cache = sa.table(name, sa.column('id', sa.Integer()), sa.column('user_id', sa.Integer()))
+        # Rows were only ever appended, so the highest id per user is the newest entry
+        newest = sa.select(sa.func.max(cache.c.id)).group_by(cache.c.user_id)
+        op.execute(cache.delete().where(cache.c.id.not_in(newest)))
+        op.create_index(f'ix_{name}_user_id', name, ['user_id'], unique=True)
+
+
+def downgrade():
+    for name in CACHE_TABLES:
+        op.drop_index(f'ix_{name}_user_id', table_name=name)
@@ -0,0 +1,44 @@
+"""per-activity Strava rows and the per-user sync cursor"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'strava_activities',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('sport_type', sa.String(), nullable=True),
+        sa.Column('start_date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('distance', sa.Float(), nullable=True),
+        sa.Column('moving_time', sa.Integer(), nullable=True),
+        sa.Column('elapsed_time', sa.Integer(), nullable=True),
+        sa.Column('average_speed', sa.Float(), nullable=True),
+        sa.Column('average_heartrate', sa.Float(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_strava_activities_user_id_start_date', 'strava_activities', ['user_id', 'start_date'])
+    op.create_index(
+        'ix_strava_activities_user_id_sport_type_start_date', 'strava_activities', ['user_id', 'sport_type', 'start_date']
+    )
+    op.create_table(
+        'strava_sync_state',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('after', sa.BigInteger(), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('strava_sync_state')
+    op.drop_index('ix_strava_activities_user_id_sport_type_start_date', table_name='strava_activities')
+    op.drop_index('ix_strava_activities_user_id_start_date', table_name='strava_activities')
+    op.drop_table('strava_activities')
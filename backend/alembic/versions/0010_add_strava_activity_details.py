@@ -0,0 +1,19 @@
+"""detailed payloads of synced Strava activities"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('strava_activities', sa.Column('details', sa.JSON(), nullable=True))
+    op.add_column('strava_activities', sa.Column('details_fetched_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('strava_activities', 'details_fetched_at')
+    op.drop_column('strava_activities', 'details')
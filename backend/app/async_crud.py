@@ -0,0 +1,189 @@
+"""Async counterparts of the ``crud`` functions used by ``async def`` route handlers.
+
+They share the query building of ``crud``; only execution differs.  Inserts go
+through the same ORM flush, so the stats rollup is kept current here too.
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, schemas
+from .models import RunStatus
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> models.User | None:
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+
+async def get_last_run(db: AsyncSession, user_id: int) -> models.Run | None:
+    """
+    Retrieves the user's most recent COMPLETED Run record from the database.
+    """
+    stmt = select(models.Run).where(*crud._owned_by(user_id), models.Run.status == RunStatus.COMPLETED)
+    stmt = crud._newest_first(stmt).limit(1)
+    return (await db.execute(stmt)).scalars().first()
+
+
+async def get_run_version(db: AsyncSession, user_id: int):
+    """
+    The user's ``(version, updated_at)``, or ``None``; see ``crud.get_run_version``.
+    """
+    return (await db.execute(crud._run_version_query(user_id))).first()
+
+
+async def create_run(db: AsyncSession, run: schemas.RunCreate, user_id: int | None = None) -> models.Run:
+    """
+    Creates a new Run record owned by ``user_id`` in the database.
+    """
+    db_run = crud._build_run(run, user_id)
+    db.add(db_run)
+    await db.commit()
+    await db.refresh(db_run)
+    return db_run
+
+
+async def create_run_from_previous(db: AsyncSession, last_run: models.Run) -> models.Run:
+    """
+    Creates a new Run based on a previous one, ensuring its status is COMPLETED.
+    """
+    return await create_run(db, crud._copy_of(last_run), user_id=last_run.user_id)
+
+
+async def _page(db: AsyncSession, stmt, skip: int, limit: int | None) -> list[models.Run]:
+    if skip:
+        stmt = stmt.offset(skip)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list((await db.execute(stmt)).scalars())
+
+
+async def get_runs(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> list[models.Run]:
+    """
+    Retrieves the user's runs newest first; see ``crud.get_runs``.
+    """
+    stmt = select(models.Run).where(*crud._owned_by(user_id))
+    return await _page(db, crud._newest_first(stmt, after), skip, limit)
+
+
+async def get_planned_runs(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[models.Run]:
+    """
+    Retrieves the user's PLANNED runs newest first; see ``crud.get_planned_runs``.
+    """
+    stmt = select(models.Run).where(*crud._owned_by(user_id), models.Run.status == RunStatus.PLANNED)
+    return await _page(db, crud._newest_first(stmt, after), skip, limit)
+
+
+async def get_cache(db: AsyncSession, model, user_id: int):
+    result = await db.execute(select(model).where(model.user_id == user_id))
+    return result.scalars().first()
+
+
+async def store_cache(db: AsyncSession, model, user_id: int, data):
+    """Insert or replace the user's cache entry; see ``crud._store_cache_stmt``."""
+    cache = (await db.execute(crud._store_cache_stmt(db, model, user_id, data))).scalar_one()
+    await db.commit()
+    return cache
+
+
+async def get_cached_zones(db: AsyncSession, user_id: int) -> models.StravaHeartRateZoneCache | None:
+    return await get_cache(db, models.StravaHeartRateZoneCache, user_id)
+
+
+async def store_cached_zones(db: AsyncSession, user_id: int, data: dict) -> models.StravaHeartRateZoneCache:
+    return await store_cache(db, models.StravaHeartRateZoneCache, user_id, data)
+
+
+async def get_cached_stats(db: AsyncSession, user_id: int) -> models.StravaStatsCache | None:
+    return await get_cache(db, models.StravaStatsCache, user_id)
+
+
+async def store_cached_stats(db: AsyncSession, user_id: int, data: dict) -> models.StravaStatsCache:
+    return await store_cache(db, models.StravaStatsCache, user_id, data)
+
+
+async def get_cached_activities(db: AsyncSession, user_id: int) -> models.StravaActivitiesCache | None:
+    return await get_cache(db, models.StravaActivitiesCache, user_id)
+
+
+async def store_cached_activities(db: AsyncSession, user_id: int, data: dict) -> models.StravaActivitiesCache:
+    return await store_cache(db, models.StravaActivitiesCache, user_id, data)
+
+
+async def store_strava_activities(db: AsyncSession, user_id: int, activities: list[dict]) -> None:
+    """Insert or replace the user's activity summaries and commit."""
+    if activities:
+        await db.execute(crud._upsert_strava_activities_stmt(db, user_id, activities))
+    await db.commit()
+
+
+async def get_strava_sync_state(db: AsyncSession, user_id: int) -> models.StravaSyncState | None:
+    return await db.get(models.StravaSyncState, user_id, populate_existing=True)
+
+
+async def set_strava_sync_cursor(db: AsyncSession, user_id: int, after: int) -> None:
+    await db.execute(crud._strava_sync_cursor_stmt(db, user_id, after))
+    await db.commit()
+
+
+async def get_strava_activities(
+    db: AsyncSession,
+    user_id: int,
+    sport_type: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    skip: int = 0,
+    limit: int | None = None,
+) -> list[models.StravaActivity]:
+    """
+    Lists the user's synced Strava activities newest first; see ``crud._strava_activities_query``.
+    """
+    return await _page(db, crud._strava_activities_query(user_id, sport_type, start, end), skip, limit)
+
+
+async def get_strava_activity_ids(
+    db: AsyncSession,
+    user_id: int,
+    ids: list[int] | None = None,
+    missing_details: bool = False,
+) -> list[int]:
+    """
+    Ids of the user's synced activities, oldest first, limited to ``ids`` if given
+    and to those without fetched details if ``missing_details``.
+    """
+    activity = models.StravaActivity
+    stmt = select(activity.id).where(activity.user_id == user_id)
+    if ids is not None:
+        stmt = stmt.where(activity.id.in_(ids))
+    if missing_details:
+        stmt = stmt.where(activity.details_fetched_at.is_(None))
+    return list((await db.execute(stmt.order_by(activity.start_date, activity.id))).scalars())
+
+
+async def count_strava_activities_missing_details(db: AsyncSession, user_id: int) -> int:
+    activity = models.StravaActivity
+    stmt = select(func.count()).where(activity.user_id == user_id, activity.details_fetched_at.is_(None))
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def store_strava_activity_details(db: AsyncSession, user_id: int, activity_id: int, details: dict) -> None:
+    activity = models.StravaActivity
+    await db.execute(
+        update(activity)
+        .where(activity.user_id == user_id, activity.id == activity_id)
+        .values(details=details, details_fetched_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
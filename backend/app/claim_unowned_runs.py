@@ -0,0 +1,30 @@
+"""Give runs created before runs were scoped to users to one user.
+
+Such runs have no owner, so no one sees them in the API or in stats.  Run
+from the ``backend`` directory::
+
+    python -m app.claim_unowned_runs user@example.com
+"""
+import sys
+
+from .crud import claim_unowned_runs
+from .database import SessionLocal
+from .models import User
+
+
+def main(email: str) -> None:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            sys.exit(f"No user with email {email}")
+        claimed = claim_unowned_runs(db, user.id)
+    finally:
+        db.close()
+    print(f"Assigned {claimed} runs to {email}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m app.claim_unowned_runs <email>")
+    main(sys.argv[1])
@@ -1,21 +1,64 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+import base64
+import io
+import json
+from typing import Iterable, Iterator, Sequence
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import desc, or_, and_, case, select, insert, update, func, event, Row, Date, Connection, Select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from . import models, schemas
 from .models import RunStatus # Import RunStatus
-from datetime import datetime
+from datetime import datetime, date, time, timedelta, timezone
 
-def get_last_run(db: Session) -> models.Run | None:
+def _owned_by(user_id: int) -> list:
+    return [models.Run.user_id == user_id]
+
+def get_last_run(db: Session, user_id: int) -> models.Run | None:
     """
-    Retrieves the most recent COMPLETED Run record from the database.
+    Retrieves the user's most recent COMPLETED Run record from the database.
     """
-    return db.query(models.Run).filter(models.Run.status == RunStatus.COMPLETED).order_by(desc(models.Run.created_at)).first()
+    query = db.query(models.Run).filter(*_owned_by(user_id), models.Run.status == RunStatus.COMPLETED)
+    return _newest_first(query).first()
 
-def create_run(db: Session, run: schemas.RunCreate) -> models.Run:
+def encode_run_cursor(run: models.Run) -> str:
     """
-    Creates a new Run record in the database.
-    The status is taken from run.status, which defaults to COMPLETED in schemas.RunCreate.
+    Opaque cursor pointing just past ``run`` in a newest-first listing.
+    """
+    raw = json.dumps([run.created_at.isoformat(), run.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_run_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodes a cursor from ``encode_run_cursor``; raises ``ValueError`` if it is malformed.
     """
-    db_run = models.Run(
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, run_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(run_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def _newest_first(query: Query | Select, after: tuple[datetime, int] | None = None) -> Query | Select:
+    # (created_at, id) descending; id breaks ties so keyset pages never skip or repeat rows
+    if after is not None:
+        created_at, run_id = after
+        query = query.filter(or_(
+            models.Run.created_at < created_at,
+            and_(models.Run.created_at == created_at, models.Run.id < run_id),
+        ))
+    return query.order_by(desc(models.Run.created_at), desc(models.Run.id))
+
+def _page(query: Query, skip: int, limit: int | None) -> list[models.Run]:
+    if skip:
+        query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def _build_run(run: schemas.RunCreate, user_id: int | None = None) -> models.Run:
+    return models.Run(
+        user_id=user_id,
         name=run.name,
         settings_snapshot=run.settings_snapshot,
         copied_from=run.copied_from,
@@ -25,16 +68,108 @@ def create_run(db: Session, run: schemas.RunCreate) -> models.Run:
         heart_rate=run.heart_rate,
         status=run.status  # Status from the input schema
     )
+
+def create_run(db: Session, run: schemas.RunCreate, user_id: int | None = None) -> models.Run:
+    """
+    Creates a new Run record owned by ``user_id`` in the database.
+    The status is taken from run.status, which defaults to COMPLETED in schemas.RunCreate.
+    """
+    db_run = _build_run(run, user_id)
     db.add(db_run)
     db.commit()
     db.refresh(db_run)
     return db_run
 
-def create_run_from_previous(db: Session, last_run: models.Run) -> models.Run:
+def create_runs(db: Session, runs: list[schemas.RunCreate], user_id: int | None = None) -> list[models.Run]:
     """
-    Creates a new Run based on a previous one, ensuring its status is COMPLETED.
+    Creates several Run records owned by ``user_id`` in a single transaction.
+    Server-generated columns are reloaded with one SELECT instead of a refresh per run.
     """
-    run_data = schemas.RunCreate(
+    db_runs = [_build_run(run, user_id) for run in runs]
+    if not db_runs:
+        return []
+    db.add_all(db_runs)
+    db.flush()
+    ids = [db_run.id for db_run in db_runs]
+    db.commit()
+    # Repopulates the expired instances in the identity map
+    db.query(models.Run).filter(models.Run.id.in_(ids)).all()
+    return db_runs
+
+# Columns written by the bulk insert paths, in COPY order
+_BULK_RUN_COLUMNS = (
+    "name", "settings_snapshot", "copied_from", "distance", "time",
+    "average_speed", "heart_rate", "status", "created_at", "user_id",
+)
+
+def _bulk_run_row(run: schemas.RunCreate, user_id: int | None) -> dict:
+    row = {column: getattr(run, column, None) for column in _BULK_RUN_COLUMNS}
+    # Stored in UTC: SQLite keeps the wall time and drops the offset
+    row["created_at"] = _as_utc(row["created_at"]) if row["created_at"] else models._utcnow()
+    row["user_id"] = user_id
+    return row
+
+def _copy_text(value) -> str:
+    # COPY text format: \N is NULL; backslash and row/column separators are escaped
+    if value is None:
+        return "\\N"
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    elif isinstance(value, RunStatus):
+        value = value.name  # Stored by enum name, as the ORM does
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _copy_runs(db: Session, rows: list[dict]) -> list[int] | None:
+    """
+    COPYs ``rows`` into a temp staging table and moves them into ``runs`` with one
+    INSERT ... SELECT.  Returns ``None`` when the DB-API driver has no COPY support.
+    """
+    cursor = db.connection().connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        return None
+    columns = ", ".join(_BULK_RUN_COLUMNS)
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS runs_bulk_staging ON COMMIT DROP AS "
+        f"SELECT 0 AS ordinal, {columns} FROM runs WITH NO DATA"
+    )
+    cursor.execute("TRUNCATE runs_bulk_staging")
+    data = "".join(
+        f"{ordinal}\t" + "\t".join(_copy_text(row[c]) for c in _BULK_RUN_COLUMNS) + "\n"
+        for ordinal, row in enumerate(rows)
+    )
+    cursor.copy_expert(f"COPY runs_bulk_staging (ordinal, {columns}) FROM STDIN", io.StringIO(data))
+    # Ids are drawn from the sequence as rows are inserted, i.e. in ordinal order
+    cursor.execute(
+        f"INSERT INTO runs ({columns}) SELECT {columns} FROM runs_bulk_staging ORDER BY ordinal RETURNING id"
+    )
+    return sorted(row[0] for row in cursor.fetchall())
+
+def insert_runs(db: Session, runs: Sequence[schemas.RunCreate], user_id: int | None = None) -> list[int]:
+    """
+    Inserts one batch of runs owned by ``user_id`` without loading ORM objects
+    and returns their ids in order.
+
+    Postgres receives the rows through ``COPY``; other databases get a single
+    multi-row ``INSERT ... RETURNING``.  The stats rollup is updated in the same
+    transaction.  The caller commits, so several batches can share one transaction.
+    """
+    rows = [_bulk_run_row(run, user_id) for run in runs]
+    if not rows:
+        return []
+    ids = None
+    if db.get_bind().dialect.name == "postgresql":
+        ids = _copy_runs(db, rows)
+    if ids is None:
+        stmt = insert(models.Run).returning(models.Run.id, sort_by_parameter_order=True)
+        ids = list(db.execute(stmt, rows).scalars())
+    add_to_stats_rollup(db, [(user_id, row["created_at"], row["distance"]) for row in rows])
+    bump_run_versions(db, [user_id])
+    return ids
+
+def _copy_of(last_run: models.Run) -> schemas.RunCreate:
+    return schemas.RunCreate(
         name=last_run.name,  # Copying name from the last run
         settings_snapshot=last_run.settings_snapshot,
         copied_from=last_run.id,
@@ -44,66 +179,477 @@ def create_run_from_previous(db: Session, last_run: models.Run) -> models.Run:
         heart_rate=last_run.heart_rate,
         status=RunStatus.COMPLETED # Explicitly set to COMPLETED
     )
-    return create_run(db=db, run=run_data)
 
-def get_runs(db: Session, skip: int = 0, limit: int | None = None) -> list[models.Run]:
+def create_run_from_previous(db: Session, last_run: models.Run) -> models.Run:
     """
-    Retrieves a list of ``Run`` records from the database with optional
+    Creates a new Run based on a previous one, ensuring its status is COMPLETED.
+    The copy belongs to the owner of ``last_run``.
+    """
+    return create_run(db=db, run=_copy_of(last_run), user_id=last_run.user_id)
+
+def get_runs(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> list[models.Run]:
+    """
+    Retrieves a list of the user's ``Run`` records from the database with optional
     pagination.  ``limit`` set to ``None`` will return all records.
 
-    Results are ordered by ``created_at`` descending.
+    Results are ordered by ``created_at`` descending.  ``after`` is a decoded
+    cursor; only runs older than that (created_at, id) position are returned.
     """
-    query = db.query(models.Run).order_by(desc(models.Run.created_at)).offset(skip)
-    if limit is not None:
-        query = query.limit(limit)
-    return query.all()
+    return _page(_newest_first(db.query(models.Run).filter(*_owned_by(user_id)), after), skip, limit)
     
-def get_completed_runs(db: Session, skip: int = 0, limit: int = 100) -> list[models.Run]:
+class utc_date(FunctionElement):
+    """The UTC calendar date of a timestamp, whatever the session time zone is."""
+    type = Date()
+    name = "utc_date"
+    inherit_cache = True
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    # SQLite keeps UTC wall times without an offset
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+@compiles(utc_date, "postgresql")
+def _compile_utc_date_postgresql(element, compiler, **kw):
+    # date() of a timestamptz would use the session time zone
+    return "date(timezone('UTC', %s))" % compiler.process(element.clauses, **kw)
+
+def _created_between(start: date | None, end: date | None) -> list:
+    # Plain range predicates on created_at so the (user_id, created_at, id) index is used
+    conditions = []
+    if start is not None:
+        conditions.append(models.Run.created_at >= datetime.combine(start, time.min, timezone.utc))
+    if end is not None:
+        conditions.append(models.Run.created_at < datetime.combine(end + timedelta(days=1), time.min, timezone.utc))
+    return conditions
+
+def _daily_totals(*group_by, where: Sequence = ()) -> Select:
+    day = utc_date(models.Run.created_at)
+    return (
+        select(*group_by, day, func.count(models.Run.id), func.coalesce(func.sum(models.Run.distance), 0.0))
+        .where(*where)
+        .group_by(*group_by, day)
+        .order_by(*group_by, day)
+    )
+
+def get_daily_run_totals(
+    db: Session,
+    user_id: int,
+    start: date | None = None,
+    end: date | None = None,
+) -> list[tuple[date, int, float]]:
+    """
+    Returns ``(day, run count, total distance)`` for every day with runs of the user,
+    oldest first, optionally only for the days ``start`` through ``end`` (inclusive).
+    The grouping happens in the database, so only one row per day is transferred.
+    """
+    stmt = _daily_totals(where=[*_owned_by(user_id), *_created_between(start, end)])
+    return [(d, count, float(total)) for d, count, total in db.execute(stmt)]
+
+# Periods kept in run_stats_rollup; daily buckets are always aggregated from the runs table
+ROLLUP_PERIODS = ("weekly", "monthly", "yearly")
+
+def _stats_period_keys(day: date, periods: Sequence[str] = ROLLUP_PERIODS) -> dict[str, str]:
+    iso = day.isocalendar()
+    keys = {
+        "daily": day.isoformat(),
+        "weekly": f"{iso.year}-W{iso.week:02d}",
+        "monthly": f"{day.year}-{day.month:02d}",
+        "yearly": str(day.year),
+    }
+    return {period: keys[period] for period in periods}
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are taken to be UTC already
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _run_day(created_at: datetime) -> date:
+    # Must agree with utc_date(created_at) in the database
+    return _as_utc(created_at).date()
+
+def _stats_rollup_deltas(
+    daily: Iterable[tuple[date, int, float]],
+    periods: Sequence[str] = ROLLUP_PERIODS,
+) -> dict[tuple[str, str], list]:
+    deltas: dict[tuple[str, str], list] = {}
+    for day, count, total_distance in daily:
+        for period, key in _stats_period_keys(day, periods).items():
+            delta = deltas.setdefault((period, key), [0, 0.0])
+            delta[0] += count
+            delta[1] += total_distance
+    return deltas
+
+def _upsert(db):
+    # ``db`` is a Connection, or a Session / AsyncSession bound to one engine
+    dialect = db.dialect.name if isinstance(db, Connection) else db.get_bind().dialect.name
+    return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+def _user_rollup_rows(daily_by_user: dict[int, list]) -> list[dict]:
+    return [
+        {"user_id": user_id, "period_type": period, "period_key": key, "count": count, "total_distance": total}
+        for user_id, daily in daily_by_user.items()
+        for (period, key), (count, total) in _stats_rollup_deltas(daily).items()
+    ]
+
+def add_to_stats_rollup(
+    db: Session | Connection,
+    runs: Iterable[tuple[int | None, datetime, float | None]],
+) -> None:
     """
-    Retrieves a list of COMPLETED Run records from the database with pagination.
-    Orders by created_at descending.
+    Adds ``(user_id, created_at, distance)`` of newly inserted runs to ``run_stats_rollup``
+    in the caller's transaction.  ORM inserts are picked up automatically on flush;
+    bulk paths that bypass the ORM call this themselves.  Runs without an owner are
+    visible to nobody and are left out.
     """
-    return db.query(models.Run).filter(models.Run.status == RunStatus.COMPLETED).order_by(desc(models.Run.created_at)).offset(skip).limit(limit).all()
+    daily_by_user: dict[int, list] = {}
+    for user_id, created_at, distance in runs:
+        if user_id is not None:
+            daily_by_user.setdefault(user_id, []).append((_run_day(created_at), 1, distance or 0.0))
+    rows = _user_rollup_rows(daily_by_user)
+    if not rows:
+        return
+    table = models.RunStatsRollup.__table__
+    stmt = _upsert(db)(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.period_type, table.c.period_key],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "total_distance": table.c.total_distance + stmt.excluded.total_distance,
+        },
+    )
+    db.execute(stmt)
 
-def get_planned_runs(db: Session, skip: int = 0, limit: int = 100) -> list[models.Run]:
+@event.listens_for(Session, "after_flush")
+def _update_stats_rollup(session: Session, flush_context) -> None:
+    new_runs = [obj for obj in session.new if isinstance(obj, models.Run)]
+    if new_runs:
+        add_to_stats_rollup(session.connection(), [(run.user_id, run.created_at, run.distance) for run in new_runs])
+
+def bump_run_versions(db: Session | Connection, user_ids: Iterable[int | None]) -> None:
     """
-    Retrieves a list of PLANNED Run records from the database with pagination.
-    Orders by created_at descending (or by another relevant field like a planned_date if added later).
+    Advances the run version of each owner in ``user_ids`` in the caller's transaction.
+    ORM changes to runs are picked up automatically on flush; bulk paths that bypass
+    the ORM call this themselves.
     """
-    return db.query(models.Run).filter(models.Run.status == RunStatus.PLANNED).order_by(desc(models.Run.created_at)).offset(skip).limit(limit).all()
+    owners = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not owners:
+        return
+    table = models.RunVersion.__table__
+    now = datetime.now(timezone.utc)
+    stmt = _upsert(db)(table).values([{"user_id": user_id, "version": 1, "updated_at": now} for user_id in owners])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
 
+@event.listens_for(Session, "after_flush")
+def _bump_run_versions(session: Session, flush_context) -> None:
+    changed = [
+        obj.user_id
+        for objs in (session.new, session.dirty, session.deleted)
+        for obj in objs
+        if isinstance(obj, models.Run)
+    ]
+    if changed:
+        bump_run_versions(session.connection(), changed)
 
-def get_cached_zones(db: Session, user_id: int) -> models.StravaHeartRateZoneCache | None:
-    return db.query(models.StravaHeartRateZoneCache).filter(models.StravaHeartRateZoneCache.user_id == user_id).first()
+def _run_version_query(user_id: int) -> Select:
+    return select(models.RunVersion.version, models.RunVersion.updated_at).where(
+        models.RunVersion.user_id == user_id
+    )
 
+def get_run_version(db: Session, user_id: int) -> Row | None:
+    """
+    The user's ``(version, updated_at)`` from ``run_versions``, or ``None`` before
+    their first run.  A primary key lookup that loads no ORM objects.
+    """
+    return db.execute(_run_version_query(user_id)).first()
 
-def store_cached_zones(db: Session, user_id: int, data: dict) -> models.StravaHeartRateZoneCache:
-    cache = models.StravaHeartRateZoneCache(user_id=user_id, data=data, fetched_at=datetime.utcnow())
-    db.add(cache)
+def rebuild_stats_rollup(db: Session) -> int:
+    """
+    Recomputes ``run_stats_rollup`` from the runs table and returns the number of rollup rows.
+    Run versions are advanced too, since stats read before the rebuild may have been wrong.
+    """
+    daily_by_user: dict[int, list] = {}
+    stmt = _daily_totals(models.Run.user_id, where=[models.Run.user_id.isnot(None)])
+    for user_id, day, count, total in db.execute(stmt):
+        daily_by_user.setdefault(user_id, []).append((day, count, float(total)))
+    rows = _user_rollup_rows(daily_by_user)
+    db.query(models.RunStatsRollup).delete()
+    db.add_all(models.RunStatsRollup(**row) for row in rows)
+    db.query(models.RunVersion).update(
+        {models.RunVersion.version: models.RunVersion.version + 1,
+         models.RunVersion.updated_at: datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+    db.commit()
+    return len(rows)
+
+def claim_unowned_runs(db: Session, user_id: int) -> int:
+    """
+    Gives every run without an owner (created before runs were scoped to users)
+    to ``user_id``, rebuilds the stats rollup and returns the number of runs claimed.
+    """
+    claimed = db.execute(
+        update(models.Run).where(models.Run.user_id.is_(None)).values(user_id=user_id)
+    ).rowcount
+    if claimed:
+        bump_run_versions(db, [user_id])
+        rebuild_stats_rollup(db)
+    else:
+        db.commit()
+    return claimed
+
+def get_run_stats(
+    db: Session,
+    user_id: int,
+    periods: Sequence[str] = ROLLUP_PERIODS,
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, dict[str, dict]]:
+    """
+    Counts and total distance of the user's runs per day, ISO week, month and/or year.
+
+    Only the requested ``periods`` are computed.  Without a date range the weekly,
+    monthly and yearly buckets are read from ``run_stats_rollup``; daily buckets and
+    ranges ``start`` through ``end`` (inclusive) are aggregated from the runs in range,
+    so buckets at the edges of a range only count the runs inside it.
+    """
+    stats = {period: {} for period in periods}
+    if start is None and end is None and "daily" not in periods:
+        rows = db.query(models.RunStatsRollup).filter(
+            models.RunStatsRollup.user_id == user_id,
+            models.RunStatsRollup.period_type.in_(periods),
+        ).order_by(models.RunStatsRollup.period_type, models.RunStatsRollup.period_key)
+        for row in rows:
+            stats[row.period_type][row.period_key] = {"count": row.count, "total_distance": row.total_distance}
+        return stats
+
+    deltas = _stats_rollup_deltas(get_daily_run_totals(db, user_id, start, end), periods)
+    for (period, key), (count, total) in sorted(deltas.items()):
+        stats[period][key] = {"count": count, "total_distance": total}
+    return stats
+
+def get_completed_runs(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[models.Run]:
+    """
+    Retrieves a list of the user's COMPLETED Run records from the database with pagination.
+    Orders by created_at descending; ``after`` is a decoded cursor as for ``get_runs``.
+    """
+    query = db.query(models.Run).filter(*_owned_by(user_id), models.Run.status == RunStatus.COMPLETED)
+    return _page(_newest_first(query, after), skip, limit)
+
+def _completed_features_filter(after: int | None, user_id: int | None = None) -> list:
+    conditions = [
+        models.Run.status == RunStatus.COMPLETED,
+        models.Run.distance.isnot(None),
+        models.Run.time.isnot(None),
+        models.Run.average_speed.isnot(None),
+    ]
+    if user_id is not None:
+        conditions.append(models.Run.user_id == user_id)
+    if after is not None:
+        # By id, not created_at: imported history is backdated but still new to the models
+        conditions.append(models.Run.id > after)
+    return conditions
+
+def count_completed_run_features(
+    db: Session,
+    after: int | None = None,
+    user_id: int | None = None,
+) -> int:
+    """
+    Counts COMPLETED runs with distance, time and average_speed set,
+    optionally only those with an id above the high-water mark ``after``
+    and only those of ``user_id``.
+    """
+    stmt = select(func.count()).select_from(models.Run).where(*_completed_features_filter(after, user_id))
+    return db.execute(stmt).scalar_one()
+
+def stream_completed_run_features(
+    db: Session,
+    limit: int | None = None,
+    after: int | None = None,
+    chunk_size: int = 1000,
+    user_id: int | None = None,
+) -> Iterator[Sequence[Row]]:
+    """
+    Streams the training columns (distance, time, average_speed, name, created_at, id)
+    of COMPLETED runs in chunks of ``chunk_size`` rows, without loading ORM objects.
+    Newest first; with ``after`` only runs with an id above that mark, in id order.
+    ``user_id`` restricts the rows to that user's runs.
+    """
+    stmt = select(
+        models.Run.distance,
+        models.Run.time,
+        models.Run.average_speed,
+        models.Run.name,
+        models.Run.created_at,
+        models.Run.id,
+    ).where(*_completed_features_filter(after, user_id))
+    if after is None:
+        stmt = stmt.order_by(desc(models.Run.created_at), desc(models.Run.id))
+    else:
+        stmt = stmt.order_by(models.Run.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+# Columns of RunResponse, in export order
+EXPORT_RUN_COLUMNS = (
+    "id", "name", "created_at", "status", "distance", "time",
+    "average_speed", "heart_rate", "copied_from", "settings_snapshot",
+)
+
+def stream_runs(db: Session, user_id: int, chunk_size: int = 1000) -> Iterator[Sequence[Row]]:
+    """
+    Streams ``EXPORT_RUN_COLUMNS`` of every run of the user, oldest first, in chunks of
+    ``chunk_size`` rows from a server-side cursor, so memory stays flat however many runs there are.
+    """
+    stmt = select(*(getattr(models.Run, column) for column in EXPORT_RUN_COLUMNS)).where(*_owned_by(user_id)).order_by(
+        models.Run.created_at, models.Run.id
+    )
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+def get_planned_runs(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> list[models.Run]:
+    """
+    Retrieves a list of the user's PLANNED Run records from the database with pagination.
+    Orders by created_at descending (or by another relevant field like a planned_date if added later);
+    ``after`` is a decoded cursor as for ``get_runs``.
+    """
+    query = db.query(models.Run).filter(*_owned_by(user_id), models.Run.status == RunStatus.PLANNED)
+    return _page(_newest_first(query, after), skip, limit)
+
+
+def _get_cache(db: Session, model, user_id: int):
+    return db.query(model).filter(model.user_id == user_id).first()
+
+
+def _store_cache_stmt(db, model, user_id: int, data):
+    # Replaces the user's entry in place; the unique index on user_id is the conflict target
+    stmt = _upsert(db)(model).values(user_id=user_id, data=data, fetched_at=datetime.now(timezone.utc))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[model.user_id],
+        set_={"data": stmt.excluded.data, "fetched_at": stmt.excluded.fetched_at},
+    )
+    return stmt.returning(model).execution_options(populate_existing=True)
+
+
+def _store_cache(db: Session, model, user_id: int, data):
+    cache = db.execute(_store_cache_stmt(db, model, user_id, data)).scalar_one()
     db.commit()
-    db.refresh(cache)
     return cache
 
 
+def get_cached_zones(db: Session, user_id: int) -> models.StravaHeartRateZoneCache | None:
+    return _get_cache(db, models.StravaHeartRateZoneCache, user_id)
+
+
+def store_cached_zones(db: Session, user_id: int, data: dict) -> models.StravaHeartRateZoneCache:
+    return _store_cache(db, models.StravaHeartRateZoneCache, user_id, data)
+
+
 def get_cached_stats(db: Session, user_id: int) -> models.StravaStatsCache | None:
-    return db.query(models.StravaStatsCache).filter(models.StravaStatsCache.user_id == user_id).first()
+    return _get_cache(db, models.StravaStatsCache, user_id)
 
 
 def store_cached_stats(db: Session, user_id: int, data: dict) -> models.StravaStatsCache:
-    cache = models.StravaStatsCache(user_id=user_id, data=data, fetched_at=datetime.utcnow())
-    db.add(cache)
-    db.commit()
-    db.refresh(cache)
-    return cache
+    return _store_cache(db, models.StravaStatsCache, user_id, data)
 
 
 def get_cached_activities(db: Session, user_id: int) -> models.StravaActivitiesCache | None:
-    return db.query(models.StravaActivitiesCache).filter(models.StravaActivitiesCache.user_id == user_id).first()
+    return _get_cache(db, models.StravaActivitiesCache, user_id)
 
 
 def store_cached_activities(db: Session, user_id: int, data: dict) -> models.StravaActivitiesCache:
-    cache = models.StravaActivitiesCache(user_id=user_id, data=data, fetched_at=datetime.utcnow())
-    db.add(cache)
-    db.commit()
-    db.refresh(cache)
-    return cache
+    return _store_cache(db, models.StravaActivitiesCache, user_id, data)
+
+
+_STRAVA_ACTIVITY_FIELDS = ("name", "distance", "moving_time", "elapsed_time", "average_speed", "average_heartrate")
+
+
+def parse_strava_datetime(value: str) -> datetime:
+    """Parse a Strava timestamp such as ``2018-02-16T14:52:54Z``.
+
+    ``datetime.fromisoformat`` only accepts the ``Z`` suffix from Python 3.11 on.
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def _strava_activity_row(user_id: int, activity: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "id": activity["id"],
+        **{field: activity.get(field) for field in _STRAVA_ACTIVITY_FIELDS},
+        "sport_type": activity.get("sport_type") or activity.get("type"),
+        "start_date": parse_strava_datetime(activity["start_date"]),
+        "data": activity,
+        "synced_at": datetime.now(timezone.utc),
+    }
+
+
+def _upsert_strava_activities_stmt(db, user_id: int, activities: Sequence[dict]):
+    # Activities seen again (edited on Strava, or re-fetched after an interrupted sync) are replaced
+    table = models.StravaActivity.__table__
+    stmt = _upsert(db)(table).values([_strava_activity_row(user_id, activity) for activity in activities])
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.id],
+        set_={column: stmt.excluded[column] for column in (*_STRAVA_ACTIVITY_FIELDS, "sport_type", "start_date", "data", "synced_at")},
+    )
+
+
+def _strava_sync_cursor_stmt(db, user_id: int, after: int):
+    table = models.StravaSyncState.__table__
+    stmt = _upsert(db)(table).values(user_id=user_id, after=after, synced_at=datetime.now(timezone.utc))
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        # Never move backwards, even when two syncs of one user overlap
+        set_={
+            "after": case((stmt.excluded.after > table.c.after, stmt.excluded.after), else_=table.c.after),
+            "synced_at": stmt.excluded.synced_at,
+        },
+    )
+
+
+def _strava_activities_query(
+    user_id: int,
+    sport_type: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> Select:
+    """
+    The user's synced activities, newest first, optionally of one sport type and
+    starting between ``start`` and ``end`` (inclusive dates, UTC).
+    """
+    activity = models.StravaActivity
+    conditions = [activity.user_id == user_id]
+    if sport_type is not None:
+        conditions.append(activity.sport_type == sport_type)
+    if start is not None:
+        conditions.append(activity.start_date >= datetime.combine(start, time.min))
+    if end is not None:
+        conditions.append(activity.start_date < datetime.combine(end + timedelta(days=1), time.min))
+    return select(activity).where(*conditions).order_by(desc(activity.start_date), desc(activity.id))
@@ -1,22 +1,217 @@
+import logging
 import os
+import threading
+import time
+from contextvars import ContextVar
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # We will import Base from models.py when needed, or it can be defined here
 # and imported into models.py if that structure is preferred later.
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db/appdb_fallback") # Default if not set
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Connection pool settings, applied to both engines (each gets its own pool)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; -1 disables
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Checkouts waiting longer than this are logged as a sign of pool saturation
+SLOW_CHECKOUT_SECONDS = float(os.getenv("DB_SLOW_CHECKOUT_MS", "100")) / 1000
+
+# Async drivers for the backends we run on; other URLs must name an async driver themselves
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Checkout counters and wait times of one engine's pool.
+
+    Counts come from SQLAlchemy pool events; wait times are measured by the
+    ``Timed*Pool`` classes, since no event fires before a checkout starts
+    waiting.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.waits = 0
+
+    def listen(self, engine: Engine) -> None:
+        pool = engine.pool
+        if isinstance(pool, _TimedCheckout):
+            pool.stats = self
+        event.listen(engine, "connect", lambda *args: self._count("connects"))
+        event.listen(engine, "checkout", lambda *args: self._count("checkouts"))
+        event.listen(engine, "checkin", lambda *args: self._count("checkins"))
+        event.listen(engine, "invalidate", lambda *args: self._count("invalidations"))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_wait(self, pool, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.timeouts += timed_out
+            slow = seconds > SLOW_CHECKOUT_SECONDS
+            self.slow_checkouts += slow
+        if slow:
+            logger.warning(
+                "%s pool checkout waited %.0f ms (%s)",
+                self.name, seconds * 1000, "timed out" if timed_out else pool.status(),
+            )
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_ms_avg": self.wait_seconds_total / self.waits * 1000 if self.waits else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return stats
+
+
+# Set while a checkout is being timed; ``QueuePool._do_get`` retries by calling itself
+_timing_checkout: ContextVar[bool] = ContextVar("timing_checkout", default=False)
+
+
+class _TimedCheckout:
+    """Times how long each checkout waits for a free slot of the pool.
+
+    Opening a connection for the checkout and the pre-ping that follows it are
+    not waiting, so they are left out.
+    """
+
+    stats: PoolStats | None = None
+
+    def _do_get(self):
+        if self.stats is None or _timing_checkout.get():
+            return super()._do_get()
+        token = _timing_checkout.set(True)
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(self, time.perf_counter() - start, timed_out=True)
+            raise
+        finally:
+            _timing_checkout.reset(token)
+        opening = record.__dict__.pop("_open_seconds", 0.0)
+        self.stats.record_wait(self, time.perf_counter() - start - opening)
+        return record
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        record._open_seconds = time.perf_counter() - start
+        return record
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(url: str, poolclass, **overrides) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        return {}
+    options = {
+        "poolclass": poolclass,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+    options.update(overrides)
+    return options
+
+
+def create_instrumented_engine(url: str, stats: PoolStats, **pool_overrides) -> Engine:
+    engine = create_engine(url, **_pool_options(url, TimedQueuePool, **pool_overrides))
+    stats.listen(engine)
+    return engine
+
+
+pool_stats = {"sync": PoolStats("sync"), "async": PoolStats("async")}
+
+# Blocking engine for sync route handlers, training jobs and scripts such as generate_mock_data.py
+engine = create_instrumented_engine(SQLALCHEMY_DATABASE_URL, pool_stats["sync"])
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Non-blocking engine for ``async def`` route handlers
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool))
+pool_stats["async"].listen(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_pool_stats() -> dict:
+    """Current pool usage and checkout statistics of both engines."""
+    return {
+        "sync": pool_stats["sync"].snapshot(engine.pool),
+        "async": pool_stats["async"].snapshot(async_engine.sync_engine.pool),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
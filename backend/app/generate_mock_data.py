@@ -1,19 +1,36 @@
 import random
+import sys
 from datetime import datetime, timedelta
+from typing import Optional
 
 from sqlalchemy.orm import Session
 
 # Use relative imports for running as a module within the 'app' package
-from models import Run, Base
-from database import SessionLocal, engine
+from . import crud  # noqa: F401  (registers the stats rollup and run version hooks)
+from .models import Run, Base, User
+from .database import SessionLocal, engine
+from .routers.auth import _hash_password
 
 
 RUN_NAMES = ["Morning Run", "Evening Jog", "Lunch Break Run", "Weekend Long Run", "Trail Adventure", "Speed Work"]
 SHOE_BRANDS = ["Nike", "Adidas", "Brooks", "Saucony", "Asics", "New Balance", "Hoka"]
 WEATHER_CONDITIONS = ["Sunny", "Cloudy", "Rainy", "Windy", "Clear Night", "Overcast"]
+DEMO_EMAIL = "demo@example.com"
+DEMO_PASSWORD = "demo"
 
-def generate_mock_runs(db: Session, num_runs: int):
-    """Generates and adds mock run data to the database."""
+def get_or_create_user(db: Session, email: str, password: str = DEMO_PASSWORD) -> User:
+    """Returns the user with ``email``, creating it with ``password`` if needed."""
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        user = User(email=email, hashed_password=_hash_password(password))
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        print(f"Created user {email} with password '{password}'.")
+    return user
+
+def generate_mock_runs(db: Session, num_runs: int, user_id: Optional[int] = None):
+    """Generates and adds mock run data to the database, owned by ``user_id`` if given."""
     run_types = ["Interval", "Long Run", "Tempo Run", "Easy/Recovery Run"]
     run_counts = {rt: 0 for rt in run_types}
     
@@ -44,6 +61,7 @@ def generate_mock_runs(db: Session, num_runs: int):
         
         run_instance = Run(
             name=name,
+            user_id=user_id,
             distance=round(distance_km, 2),
             time=time_sec,
             average_speed=round(average_speed_kph, 2),
@@ -96,6 +114,7 @@ def generate_mock_runs(db: Session, num_runs: int):
             
             run_instance = Run(
                 name=f"Additional {rt} Run",
+                user_id=user_id,
                 distance=round(distance_km, 2),
                 time=time_sec,
                 average_speed=round(avg_speed, 2),
@@ -109,8 +128,8 @@ def generate_mock_runs(db: Session, num_runs: int):
     db.commit()
     print(f"Successfully added {num_runs} initial mock runs plus additional runs to ensure at least 2 samples per run type.")
 
-def main():
-    """Main function to set up DB and generate mock data."""
+def main(owner_email: str = DEMO_EMAIL):
+    """Main function to set up DB and generate mock data owned by ``owner_email``."""
     print("Creating database tables if they don't exist...")
     # Ensure tables are created
     Base.metadata.create_all(bind=engine)
@@ -118,8 +137,9 @@ def main():
 
     db = SessionLocal()
     try:
-        print("Generating mock runs...")
-        generate_mock_runs(db, num_runs=50)
+        owner = get_or_create_user(db, owner_email)
+        print(f"Generating mock runs for {owner.email}...")
+        generate_mock_runs(db, num_runs=50, user_id=owner.id)
     except Exception as e:
         print(f"An error occurred: {e}")
         db.rollback()  # Rollback in case of error
@@ -128,4 +148,5 @@ def main():
         print("Database session closed.")
 
 if __name__ == "__main__":
-    main()
+    # Usage, from the backend directory: python -m app.generate_mock_data [owner_email]
+    main(*sys.argv[1:2])
@@ -1,23 +1,43 @@
-import os
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Dict, Any, Literal, Optional, Union
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
-from . import crud, models, schemas
-from .database import get_db
-from .services.ai_model import predict_run_type, generate_training_plan
+from . import async_crud, crud, models, schemas
+from .database import SessionLocal, async_engine, get_async_db, get_db
+from .services.strava.cache import cancel_refreshes as cancel_strava_refreshes
+from .services.strava.client import close_client as close_strava_client
+from .services.ai_model import predict_run_type, predict_run_types, generate_training_plan
 from .models import RunStatus # Import RunStatus for setting planned runs
 
-from .routers import network, strava, auth
+from .routers import network, strava, auth, internal
 
 # Load environment variables from .env file
 load_dotenv()
 # Database tables are created via Alembic migrations.
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await cancel_strava_refreshes()
+    await close_strava_client()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,53 +45,214 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 
+def _cache_headers(user_id: int, version) -> Dict[str, str]:
+    # Every run-derived response of a user is validated by that user's run version
+    number, updated_at = version or (0, None)
+    headers = {"ETag": f'"{user_id}-{number}"', "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if updated_at is not None:
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+def _is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence and uses weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+def _conditional(request: Request, response: Response, user_id: int, version) -> Optional[Response]:
+    """
+    Returns a bodiless ``304 Not Modified`` when the client's copy is still current;
+    otherwise adds the validators to ``response`` and returns ``None``.
+    """
+    headers = _cache_headers(user_id, version)
+    if _is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 @app.post("/runs/new-from-last", response_model=schemas.RunResponse)
-def create_new_run_from_last(db: Session = Depends(get_db)):
+async def create_new_run_from_last(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async),
+):
     """
-    Creates a new run by copying settings from the most recent previous run.
+    Creates a new run by copying settings from the user's most recent previous run.
     If no previous runs exist, it returns a 404 error.
     """
-    last_run = crud.get_last_run(db=db)
+    last_run = await async_crud.get_last_run(db=db, user_id=current_user.id)
     if last_run is None:
         raise HTTPException(status_code=404, detail="No previous runs found to copy from.")
     
-    new_run = crud.create_run_from_previous(db=db, last_run=last_run)
+    new_run = await async_crud.create_run_from_previous(db=db, last_run=last_run)
     return new_run
 
 @app.get("/runs/last", response_model=schemas.RunResponse)
-def get_latest_run(db: Session = Depends(get_db)):
+async def get_latest_run(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async),
+):
     """
-    Retrieves the most recent run.
+    Retrieves the user's most recent run.
     If no runs exist, it returns a 404 error.
+    Supports conditional requests through ``ETag``/``Last-Modified``.
     """
-    last_run = crud.get_last_run(db=db)
+    not_modified = _conditional(request, response, current_user.id, await async_crud.get_run_version(db, current_user.id))
+    if not_modified is not None:
+        return not_modified
+    last_run = await async_crud.get_last_run(db=db, user_id=current_user.id)
     if last_run is None:
         raise HTTPException(status_code=404, detail="No previous runs found.")
     return last_run
 
+def _decode_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return crud.decode_run_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def _set_next_cursor(response: Response, runs: List[models.Run], limit: int) -> None:
+    # A full page may have a successor; the client passes this back as ``cursor``
+    if runs and len(runs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = crud.encode_run_cursor(runs[-1])
+
 @app.get("/runs", response_model=List[schemas.RunResponse])
-def read_runs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_runs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async),
+):
     """
-    Retrieve all runs with pagination.
+    Retrieve all of the user's runs with pagination.
+    Pass the ``X-Next-Cursor`` header of a page as ``cursor`` to fetch the next one
+    without the cost of a growing ``skip``.  Supports conditional requests.
     """
-    runs = crud.get_runs(db, skip=skip, limit=limit)
+    not_modified = _conditional(request, response, current_user.id, await async_crud.get_run_version(db, current_user.id))
+    if not_modified is not None:
+        return not_modified
+    runs = await async_crud.get_runs(db, current_user.id, skip=skip, limit=limit, after=_decode_cursor(cursor))
+    _set_next_cursor(response, runs, limit)
     return runs
 
 @app.get("/runs/planned", response_model=List[schemas.RunResponse])
-def read_planned_runs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_planned_runs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async),
+):
     """
-    Retrieve all planned runs with pagination.
+    Retrieve the user's planned runs with pagination, by ``skip`` or by ``cursor`` as for ``/runs``.
     """
-    runs = crud.get_planned_runs(db, skip=skip, limit=limit)
+    not_modified = _conditional(request, response, current_user.id, await async_crud.get_run_version(db, current_user.id))
+    if not_modified is not None:
+        return not_modified
+    runs = await async_crud.get_planned_runs(db, current_user.id, skip=skip, limit=limit, after=_decode_cursor(cursor))
+    _set_next_cursor(response, runs, limit)
     return runs
 
+BULK_BATCH_SIZE = 1000
+BULK_BODY_ERROR = "Body must be a JSON array of runs or NDJSON (one run per line)."
+
+async def _bulk_rows(request: Request) -> AsyncIterator[tuple[int, Union[bytes, Any]]]:
+    """
+    Yields ``(index, row)`` from a JSON array body, or from an NDJSON body as it streams in.
+    NDJSON rows are raw lines so that malformed JSON is reported for that row only.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        index, buffer = 0, b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=BULK_BODY_ERROR)
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail=BULK_BODY_ERROR)
+    for index, row in enumerate(body):
+        yield index, row
+
+@app.post("/runs/bulk", response_model=schemas.RunBulkResponse)
+async def create_runs_bulk(
+    request: Request,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Imports many runs for the user at once from a JSON array of runs or from NDJSON
+    (``Content-Type: application/x-ndjson``), which is processed as it arrives.
+
+    Valid rows are inserted in batches of ``BULK_BATCH_SIZE`` within one transaction;
+    invalid rows are reported per row.  With ``atomic=true`` any invalid row rolls the
+    whole import back and the errors are returned with a 422.
+    """
+    created: List[int] = []
+    errors: List[schemas.RunBulkError] = []
+    batch: List[schemas.RunBulkItem] = []
+    try:
+        async for index, row in _bulk_rows(request):
+            try:
+                if isinstance(row, bytes):
+                    batch.append(schemas.RunBulkItem.model_validate_json(row))
+                else:
+                    batch.append(schemas.RunBulkItem.model_validate(row))
+            except ValidationError as e:
+                errors.append(schemas.RunBulkError(index=index, errors=json.loads(e.json(include_url=False))))
+                continue
+            if len(batch) >= BULK_BATCH_SIZE:
+                created += await run_in_threadpool(crud.insert_runs, db, batch, current_user.id)
+                batch = []
+        if atomic and errors:
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(status_code=422, detail=[error.model_dump() for error in errors])
+        created += await run_in_threadpool(crud.insert_runs, db, batch, current_user.id)
+        await run_in_threadpool(db.commit)
+    except BaseException:
+        await run_in_threadpool(db.rollback)
+        raise
+    return schemas.RunBulkResponse(created=created, errors=errors)
+
 @app.post("/runs/predict", response_model=schemas.RunPredictionResponse)
 def predict_and_plan_run(
     prediction_request: schemas.RunPredictionRequest, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
 ):
     # 1. Prepare features for the prediction model
     features_for_prediction = {
@@ -87,8 +268,9 @@ def predict_and_plan_run(
     # For simplicity, we'll pass them as-is and let predict_run_type handle it.
     # If any required field for the model (distance, time, average_speed) is None, prediction might be less accurate or fall back to heuristic.
 
-    # 2. Get prediction from the AI model
-    predicted_type = predict_run_type(run_features=features_for_prediction)
+    # 2. Get prediction from the AI model (the user's personal model if one was trained)
+    user_id = current_user.id
+    predicted_type = predict_run_type(run_features=features_for_prediction, user_id=user_id)
 
     # 3. Create a new "planned" run
     planned_run_data = schemas.RunCreate(
@@ -105,7 +287,7 @@ def predict_and_plan_run(
         }
     )
     
-    db_planned_run = crud.create_run(db=db, run=planned_run_data)
+    db_planned_run = crud.create_run(db=db, run=planned_run_data, user_id=user_id)
 
     # 4. Return the created planned run along with the prediction type
     # Convert db_planned_run (models.Run) to schemas.Run, then add predicted_type for RunPredictionResponse
@@ -118,44 +300,148 @@ def predict_and_plan_run(
         **run_response_part.model_dump(),
         predicted_run_type=predicted_type,
         training_plan=prediction_request.training_plan
-        or generate_training_plan(predicted_type, prediction_request.distance or 0.0)["training_plan"]
+        or generate_training_plan(predicted_type, prediction_request.distance or 0.0, user_id=user_id)["training_plan"]
     )
     
     return final_response
 
+@app.post("/runs/predict/batch", response_model=List[schemas.RunPredictionResponse])
+def predict_and_plan_runs(
+    batch_request: schemas.RunBatchPredictionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Predicts run types for many runs at once and stores them as planned runs.
+    The whole batch goes through the model as one matrix and is written in a single transaction.
+    """
+    requests = batch_request.runs
+    user_id = current_user.id
+    predicted_types = predict_run_types(user_id=user_id, runs_features=[
+        {
+            "distance": req.distance,
+            "time": req.time,
+            "average_speed": req.average_speed,
+            "name": req.name,
+        }
+        for req in requests
+    ])
+
+    planned_runs_data = [
+        schemas.RunCreate(
+            name=req.name or f"{predicted_type} (AI Suggested)",
+            distance=req.distance,
+            time=req.time,
+            average_speed=req.average_speed,
+            status=RunStatus.PLANNED,
+            settings_snapshot={
+                "user_inputs": req.model_dump(),
+                "predicted_run_type": predicted_type,
+                "ai_model_version": "0.1.0",
+                **({"training_plan": req.training_plan} if req.training_plan else {})
+            }
+        )
+        for req, predicted_type in zip(requests, predicted_types)
+    ]
+    db_planned_runs = crud.create_runs(db=db, runs=planned_runs_data, user_id=user_id)
+
+    # Many runs share a (run type, distance) pair, so generate each plan only once
+    plans: Dict[tuple, Any] = {}
+    responses = []
+    for req, predicted_type, db_run in zip(requests, predicted_types, db_planned_runs):
+        training_plan = req.training_plan
+        if not training_plan:
+            key = (predicted_type, req.distance or 0.0)
+            if key not in plans:
+                plans[key] = generate_training_plan(*key, user_id=user_id)["training_plan"]
+            training_plan = plans[key]
+        responses.append(schemas.RunPredictionResponse(
+            **schemas.Run.model_validate(db_run).model_dump(),
+            predicted_run_type=predicted_type,
+            training_plan=training_plan,
+        ))
+    return responses
+
+STATS_GRANULARITIES = {"day": "daily", "week": "weekly", "month": "monthly", "year": "yearly"}
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, RunStatus):
+        return value.value
+    return value
+
+def _export_runs(format: str, user_id: int) -> Iterator[str]:
+    # Uses its own session: the request's session may be closed before streaming ends
+    db = SessionLocal()
+    try:
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(crud.EXPORT_RUN_COLUMNS)
+        for chunk in crud.stream_runs(db, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+            if format == "csv":
+                for row in chunk:
+                    writer.writerow([
+                        json.dumps(value) if isinstance(value, dict) else _export_value(value)
+                        for value in row
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield "".join(
+                    json.dumps({column: _export_value(value) for column, value in row._mapping.items()}) + "\n"
+                    for row in chunk
+                )
+        if format == "csv" and buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@app.get("/runs/export")
+def export_runs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Streams every run of the user, oldest first, as NDJSON (one ``RunResponse`` object per line) or CSV.
+    Rows are read from a server-side cursor in chunks, so memory use does not grow with history.
+    """
+    return StreamingResponse(
+        _export_runs(format, current_user.id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="runs.{format}"'},
+    )
+
 @app.get("/runs/stats", response_model=schemas.StatsResponse)
-def get_run_stats(db: Session = Depends(get_db)):
-    """
-    Retrieves statistics about completed runs, grouped by week, month, and year.
-    """
-    runs = crud.get_runs(db=db, limit=None)
-    stats = {"weekly": {}, "monthly": {}, "yearly": {}}
-
-    for run in runs:
-        # Weekly stats
-        year_week = f"{run.created_at.isocalendar().year}-W{run.created_at.isocalendar().week:02d}"
-        if year_week not in stats["weekly"]:
-            stats["weekly"][year_week] = {"count": 0, "total_distance": 0.0}
-        stats["weekly"][year_week]["count"] += 1
-        stats["weekly"][year_week]["total_distance"] += run.distance if run.distance else 0.0
-
-        # Monthly stats
-        year_month = f"{run.created_at.year}-{run.created_at.month:02d}"
-        if year_month not in stats["monthly"]:
-            stats["monthly"][year_month] = {"count": 0, "total_distance": 0.0}
-        stats["monthly"][year_month]["count"] += 1
-        stats["monthly"][year_month]["total_distance"] += run.distance if run.distance else 0.0
-
-        # Yearly stats
-        year = str(run.created_at.year)
-        if year not in stats["yearly"]:
-            stats["yearly"][year] = {"count": 0, "total_distance": 0.0}
-        stats["yearly"][year]["count"] += 1
-        stats["yearly"][year]["total_distance"] += run.distance if run.distance else 0.0
-    
-    return stats
+def get_run_stats(
+    request: Request,
+    response: Response,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    granularity: List[Literal["day", "week", "month", "year"]] = Query(["week", "month", "year"]),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """
+    Retrieves statistics about the user's runs, grouped by day, ISO week, month, and/or year.
+    ``from``/``to`` (inclusive dates) limit the runs counted; ``granularity`` may be repeated.
+    Supports conditional requests through ``ETag``/``Last-Modified``.
+    """
+    if from_ is not None and to is not None and from_ > to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    not_modified = _conditional(request, response, current_user.id, crud.get_run_version(db, current_user.id))
+    if not_modified is not None:
+        return not_modified
+    periods = [STATS_GRANULARITIES[g] for g in dict.fromkeys(granularity)]
+    return crud.get_run_stats(db, current_user.id, periods=periods, start=from_, end=to)
 
 
 app.include_router(network.router)
 app.include_router(auth.router)
-app.include_router(strava.router)
\ No newline at end of file
+app.include_router(strava.router)
+app.include_router(internal.router)
\ No newline at end of file
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Float, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, ForeignKey, Float, Index, Enum as SQLAlchemyEnum
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime, timezone
 import enum
 
 Base = declarative_base()
 
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class RunStatus(str, enum.Enum):
     PLANNED = "planned"
     COMPLETED = "completed"
@@ -12,10 +17,19 @@ class RunStatus(str, enum.Enum):
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        # Serves status-filtered, newest-first listings across all users (training data)
+        Index("ix_runs_status_created_at_id", "status", "created_at", "id"),
+        # Per-user listings, keyset pagination and date ranges only touch that user's rows
+        Index("ix_runs_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_runs_user_id_status_created_at_id", "user_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Stamped client-side with microseconds so (created_at, id) high-water marks compare exactly;
+    # the server default still covers rows inserted outside the ORM.
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now(), index=True)
     copied_from = Column(Integer, ForeignKey("runs.id"), nullable=True)
     settings_snapshot = Column(JSON)
     distance = Column(Float, nullable=True)
@@ -23,6 +37,27 @@ class Run(Base):
     average_speed = Column(Float, nullable=True)
     heart_rate = Column(Integer, nullable=True)
     status = Column(SQLAlchemyEnum(RunStatus), default=RunStatus.COMPLETED, nullable=False) # New field
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Owner; runs from before ownership have none
+
+
+class RunStatsRollup(Base):
+    """Run count and total distance per user and period, kept current as runs are inserted."""
+    __tablename__ = "run_stats_rollup"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period_type = Column(String, primary_key=True)  # "weekly", "monthly" or "yearly"
+    period_key = Column(String, primary_key=True)  # e.g. "2024-W05", "2024-02", "2024"
+    count = Column(Integer, nullable=False, default=0)
+    total_distance = Column(Float, nullable=False, default=0.0)
+
+
+class RunVersion(Base):
+    """Per-user change counter of runs, used as the validator for HTTP caching."""
+    __tablename__ = "run_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
 
 
 class User(Base):
@@ -40,7 +75,7 @@ class StravaHeartRateZoneCache(Base):
     __tablename__ = "strava_heart_rate_zone_cache"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)  # one entry per user
     data = Column(JSON, nullable=False)
     fetched_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -49,7 +84,7 @@ class StravaStatsCache(Base):
     __tablename__ = "strava_stats_cache"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)  # one entry per user
     data = Column(JSON, nullable=False)
     fetched_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -58,7 +93,40 @@ class StravaActivitiesCache(Base):
     __tablename__ = "strava_activities_cache"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)  # one entry per user
     data = Column(JSON, nullable=False)
     fetched_at = Column(DateTime(timezone=True), server_default=func.now())
 
+
+class StravaActivity(Base):
+    """One Strava activity summary of a user, kept current by the incremental sync."""
+    __tablename__ = "strava_activities"
+    __table_args__ = (
+        # Newest-first listings of a user's activities, optionally of one sport type
+        Index("ix_strava_activities_user_id_start_date", "user_id", "start_date"),
+        Index("ix_strava_activities_user_id_sport_type_start_date", "user_id", "sport_type", "start_date"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=False)  # Strava activity id
+    name = Column(String, nullable=True)
+    sport_type = Column(String, nullable=True)  # "Run", "TrailRun", "Ride", ...
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    distance = Column(Float, nullable=True)  # metres, as reported by Strava
+    moving_time = Column(Integer, nullable=True)  # seconds
+    elapsed_time = Column(Integer, nullable=True)
+    average_speed = Column(Float, nullable=True)  # m/s
+    average_heartrate = Column(Float, nullable=True)
+    data = Column(JSON, nullable=False)  # the full summary payload
+    synced_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    details = Column(JSON, nullable=True)  # detailed payload with segment efforts; NULL until fetched
+    details_fetched_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class StravaSyncState(Base):
+    """Per-user position of the activity sync: only activities that start after ``after`` are fetched."""
+    __tablename__ = "strava_sync_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    after = Column(BigInteger, nullable=False, default=0)  # epoch seconds of the newest synced start_date
+    synced_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+"""Recompute the ``run_stats_rollup`` table from the runs table.
+
+Run from the ``backend`` directory::
+
+    python -m app.rebuild_stats_rollup
+"""
+from .crud import rebuild_stats_rollup
+from .database import SessionLocal
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        rows = rebuild_stats_rollup(db)
+    finally:
+        db.close()
+    print(f"Rebuilt run_stats_rollup with {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
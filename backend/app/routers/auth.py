@@ -5,12 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import os
 from ..schemas import Token, User
-from ..database import get_db
-from .. import models
+from ..database import get_async_db, get_db
+from .. import async_crud, models
 import hashlib
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret")
@@ -18,6 +19,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -60,24 +62,52 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+def _token_subject(token: str) -> str:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_exception()
+    username: str = payload.get("sub")
+    if username is None:
+        raise _credentials_exception()
+    return username
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
-    credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    username = _token_subject(token)
     user = db.query(models.User).filter(models.User.email == username).first()
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """``get_current_user`` for ``async def`` handlers, without blocking the event loop."""
+    user = await async_crud.get_user_by_email(db, _token_subject(token))
+    if not user:
+        raise _credentials_exception()
+    return user
+
+
+def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Optional[models.User]:
+    """Return the authenticated user, or ``None`` for anonymous requests."""
+    if token is None:
+        return None
+    return get_current_user(token, db)
+
 
 
 @router.post("/register", response_model=User)
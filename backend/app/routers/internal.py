@@ -0,0 +1,31 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+
+from app.database import get_pool_stats
+
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN")
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """The ``/internal`` endpoints do not exist unless ``INTERNAL_TOKEN`` is configured."""
+    if not INTERNAL_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_internal_token or "", INTERNAL_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/db/pool")
+def database_pool_stats():
+    """Checked-out, overflow and checkout wait statistics of the database pools."""
+    return get_pool_stats()
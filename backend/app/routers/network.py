@@ -1,31 +1,81 @@
-from fastapi import APIRouter, Depends, Body, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
 
-from app.database import get_db
-from app import schemas
-from app.services.ai_model import get_run_plan, generate_training_plan, train_models
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app import models, schemas
+from app.routers.auth import get_current_user, get_optional_user
+from app.services.ai_model import generate_training_plan
+from app.services.training_jobs import training_jobs, TrainingJob, TrainingJobInProgress
 
 
 router = APIRouter(prefix="/network", tags=["network"])
 
 
+def _job_response(job: TrainingJob) -> schemas.TrainingJobResponse:
+    return schemas.TrainingJobResponse(
+        job_id=job.id,
+        status=job.status,
+        detail=job.detail,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        progress=list(job.progress),
+        result=job.result,
+    )
+
+
 @router.post("/plan/custom", response_model=schemas.RunPlanResponse)
-def custom_plan(request: schemas.RunPlanRequest):
-    plan = generate_training_plan(request.run_type, request.distance or 0.0)
+def custom_plan(
+    request: schemas.RunPlanRequest,
+    current_user: Optional[models.User] = Depends(get_optional_user),
+):
+    user_id = current_user.id if current_user else None
+    plan = generate_training_plan(request.run_type, request.distance or 0.0, user_id=user_id)
     return {"run_type": plan["run_type"], "training_plan": plan["training_plan"]}
 
-@router.post("/train")
-def retrain_model(db: Session = Depends(get_db)):
+@router.post("/train", response_model=schemas.TrainingJobResponse, status_code=202)
+def retrain_model(
+    full: bool = False,
+    search: bool = False,
+    budget_seconds: float = Query(300, gt=0),
+):
+    """
+    Start training of classifier + regressor in a background process.
+    By default the saved models are updated with runs completed since they were trained;
+    ``full=true`` (or a new run type) retrains from scratch on all completed runs.
+    ``search=true`` instead grid-searches architectures on all cores within ``budget_seconds``
+    and keeps the best models.
+    Poll ``GET /network/train/{job_id}`` for per-epoch progress and the outcome.
+    """
+    if search:
+        options = {"search": True, "budget_seconds": budget_seconds}
+    else:
+        options = {"incremental": not full}
+    try:
+        job = training_jobs.start(limit=10000, **options)
+    except TrainingJobInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _job_response(job)
+
+@router.post("/train/me", response_model=schemas.TrainingJobResponse, status_code=202)
+def train_personal_model(current_user: models.User = Depends(get_current_user)):
     """
-    Trigger training of classifier + regressor on all completed runs.
+    Start training of a personal classifier + regressor on the current user's completed runs.
+    Users without enough runs keep being served by the global model.
     """
     try:
-        train_models(limit=10000)
-    except RuntimeError as e:
-        # Known training issues such as insufficient data
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        # Unexpected failures
-        raise HTTPException(status_code=500, detail=f"Training failed: {e}")
-
-    return {"detail": "Model retrained successfully"}
\ No newline at end of file
+        job = training_jobs.start(limit=10000, user_id=current_user.id)
+    except TrainingJobInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _job_response(job)
+
+@router.get("/train/{job_id}", response_model=schemas.TrainingJobResponse)
+def get_training_job(job_id: str, current_user: models.User = Depends(get_current_user)):
+    """
+    Report the status and per-epoch losses of a training job.
+    Personal training jobs are only visible to the user they train for.
+    """
+    job = training_jobs.get(job_id)
+    owner = job.options.get("user_id") if job is not None else None
+    if job is None or owner not in (None, current_user.id):
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return _job_response(job)
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from dotenv import load_dotenv
 import os
 
@@ -7,17 +10,13 @@ from app.services.strava.athlete import (
     fetch_athlete_stats,
     fetch_athlete_activities,
 )
-from app.crud import (
-    get_cached_zones,
-    store_cached_zones,
-    get_cached_stats,
-    store_cached_stats,
-    get_cached_activities,
-    store_cached_activities,
-)
-from app.routers.auth import get_current_user
-from app.database import get_db
-from sqlalchemy.orm import Session
+from app.services.strava.cache import flights, get_or_fetch
+from app.services.strava.sync import sync_activities
+from app.services.strava.details import fetch_activity_details_batch
+from app import async_crud, schemas
+from app.routers.auth import get_current_user_async
+from app.database import AsyncSessionLocal, get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 
 load_dotenv()
 
@@ -34,45 +33,81 @@ router = APIRouter(
 
 @router.get("/athlete/zones")
 async def get_athlete_zones(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Return heart rate zones, caching per user."""
-    cached = get_cached_zones(db, current_user.id)
-    if cached:
-        return cached.data
-    live = fetch_athlete_zones(ACCESS_TOKEN)
-    store_cached_zones(db, current_user.id, live)
-    return live
+    return await get_or_fetch(db, "zones", current_user.id, lambda: fetch_athlete_zones(ACCESS_TOKEN))
 
 
 @router.get("/athlete/stats")
 async def get_athlete_stats(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Return athlete statistics, caching per user."""
-    cached = get_cached_stats(db, current_user.id)
-    if cached:
-        return cached.data
-    live = fetch_athlete_stats(ACCESS_TOKEN, current_user.id)
-    store_cached_stats(db, current_user.id, live)
-    return live
+    return await get_or_fetch(
+        db, "stats", current_user.id, lambda: fetch_athlete_stats(ACCESS_TOKEN, current_user.id)
+    )
 
 
 @router.get("/athlete/activities")
 async def get_athlete_activities(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Return athlete activities, caching per user."""
-    cached = get_cached_activities(db, current_user.id)
-    if cached:
-        return cached.data
-    live = fetch_athlete_activities(ACCESS_TOKEN)
-    store_cached_activities(db, current_user.id, live)
-    return live
+    return await get_or_fetch(db, "activities", current_user.id, lambda: fetch_athlete_activities(ACCESS_TOKEN))
 
 
+@router.post("/activities/sync", response_model=schemas.StravaSyncResponse)
+async def sync_athlete_activities(current_user=Depends(get_current_user_async)):
+    """
+    Fetch activities newer than the user's sync cursor (the full history the first time).
+    Requests made while a sync of the user is running share its result.
+    """
+    async def sync():
+        async with AsyncSessionLocal() as db:
+            return await sync_activities(db, current_user.id, ACCESS_TOKEN)
 
+    return await flights.do(("sync", current_user.id), sync)
 
+
+@router.get("/activities", response_model=List[schemas.StravaActivity])
+async def list_synced_activities(
+    sport_type: Optional[str] = None,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List the user's synced activities newest first, from the local copy only.
+    ``from``/``to`` are inclusive start dates (UTC).
+    """
+    if from_ is not None and to is not None and from_ > to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    return await async_crud.get_strava_activities(
+        db, current_user.id, sport_type=sport_type, start=from_, end=to, skip=skip, limit=limit
+    )
+
+
+@router.post("/activities/details", response_model=schemas.StravaDetailsResponse)
+async def fetch_synced_activity_details(
+    request: Optional[schemas.StravaDetailsRequest] = None,
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Fetch detailed payloads of synced activities, several at a time.
+    Without ``activity_ids`` this resumes the backfill of every activity lacking details.
+    """
+    requested = request.activity_ids if request is not None else None
+    ids = await async_crud.get_strava_activity_ids(
+        db, current_user.id, ids=requested, missing_details=requested is None
+    )
+    result = await fetch_activity_details_batch(current_user.id, ACCESS_TOKEN, ids)
+    remaining = await async_crud.count_strava_activities_missing_details(db, current_user.id)
+    return {**result, "remaining": remaining}
@@ -28,6 +28,7 @@ class RunResponse(Run):
     pass
 
 class StatsResponse(BaseModel):
+    daily: Dict[str, Dict[str, Any]] = {}
     weekly: Dict[str, Dict[str, Any]] = {}
     monthly: Dict[str, Dict[str, Any]] = {}
     yearly: Dict[str, Dict[str, Any]] = {}
@@ -41,7 +42,21 @@ class RunPredictionRequest(BaseModel):
 
 class RunPredictionResponse(RunResponse):
     predicted_run_type: str
-    training_plan: Dict[str, Any]
+    training_plan: Union[Dict[str, Any], List[Dict[str, str]]]
+
+class RunBulkItem(RunCreate):
+    created_at: Optional[datetime] = None  # Set when importing history; defaults to now
+
+class RunBulkError(BaseModel):
+    index: int  # Zero-based position of the row in the request
+    errors: List[Dict[str, Any]]
+
+class RunBulkResponse(BaseModel):
+    created: List[int]
+    errors: List[RunBulkError] = []
+
+class RunBatchPredictionRequest(BaseModel):
+    runs: List[RunPredictionRequest]
 
 class RunPlanRequest(BaseModel):
     run_type: str  # “Interval”, “Tempo Run”, “Long Run”, “Easy/Recovery Run”
@@ -51,6 +66,47 @@ class RunPlanResponse(BaseModel):
     run_type: str
     training_plan: Union[Dict[str, Any], List[Dict[str, str]]]
 
+class TrainingEpoch(BaseModel):
+    model: str  # "classifier" or "regressor"
+    epoch: int
+    epochs: int
+    loss: float
+
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str  # "running", "completed" or "failed"
+    detail: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    progress: List[TrainingEpoch] = []
+    result: Optional[Dict[str, Any]] = None
+
+class StravaActivity(BaseModel):
+    id: int
+    name: Optional[str] = None
+    sport_type: Optional[str] = None
+    start_date: datetime
+    distance: Optional[float] = None  # metres
+    moving_time: Optional[int] = None  # seconds
+    elapsed_time: Optional[int] = None
+    average_speed: Optional[float] = None  # m/s
+    average_heartrate: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class StravaSyncResponse(BaseModel):
+    synced: int  # Activities fetched by this sync
+    after: int  # Sync cursor: epoch seconds of the newest synced activity start
+
+class StravaDetailsRequest(BaseModel):
+    activity_ids: Optional[List[int]] = None  # Defaults to every synced activity still lacking details
+
+class StravaDetailsResponse(BaseModel):
+    fetched: List[int]
+    failed: Dict[int, str] = {}  # Error message per activity id
+    remaining: int  # Synced activities still lacking details
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -1,21 +1,154 @@
+import itertools
+import multiprocessing
 import os
+import threading
+import time
+from collections import OrderedDict
 import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
-
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.neural_network import MLPClassifier, MLPRegressor
-from sklearn.metrics import classification_report, mean_squared_error
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 from app import crud
 from app.database import SessionLocal
+from app.services import inference
 
 BASE_DIR = os.path.dirname(__file__)
-MODEL_DIR = os.path.join(BASE_DIR, "models")
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(BASE_DIR, "models"))
 CLASSIF_PATH = os.path.join(MODEL_DIR, "run_type_classifier.joblib")
 REGRESS_PATH = os.path.join(MODEL_DIR, "run_feature_regressor.joblib")
+# NumPy export of both models used for serving; the joblib files are kept for training
+MODELS_NPZ_PATH = os.path.join(MODEL_DIR, "run_models.npz")
+FEATURE_COLUMNS = ["distance", "time", "average_speed"]
+TRAINING_CHUNK_SIZE = 5000
+USER_MODEL_DIR = os.path.join(MODEL_DIR, "users")
+# Users with fewer completed runs are served by the global model
+USER_MODEL_MIN_RUNS = int(os.getenv("USER_MODEL_MIN_RUNS", "30"))
+USER_MODEL_CACHE_BYTES = int(os.getenv("USER_MODEL_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+_spawn = multiprocessing.get_context("spawn")
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded model artifacts.
+
+    Each artifact is unpickled once and kept in memory.  On every lookup the
+    file is ``stat``-ed and, when ``train_models`` has replaced it (different
+    mtime, size or inode), the new version is loaded and swapped in under a
+    lock.  Callers receive the whole package dict, so a request that already
+    holds a reference keeps a consistent model even if a reload happens
+    concurrently.
+    """
+
+    def __init__(self, loader: Callable[[str], Any] = joblib.load):
+        self._loader = loader
+        self._entries: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self, path: str, loader: Optional[Callable[[str], Any]] = None) -> Optional[Any]:
+        """Return the loaded artifact at ``path`` or ``None`` if it does not exist.
+
+        ``loader`` overrides the registry's default loader for this artifact.
+        """
+        version = self._version(path)
+        if version is None:
+            return None
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            pkg = (loader or self._loader)(path)
+            self._entries[path] = (version, pkg)
+            return pkg
+
+    def clear(self) -> None:
+        """Drop every cached artifact; the next ``get`` reloads from disk."""
+        with self._lock:
+            self._entries.clear()
+
+
+model_registry = ModelRegistry()
+
+
+class UserModelCache:
+    """Bounded LRU cache of per-user NumPy models.
+
+    Entries are evicted least recently used first once the arrays held in
+    memory exceed ``max_bytes``, so only the active users' models stay
+    resident.  Like ``ModelRegistry`` a retrained file is noticed by its
+    mtime/size/inode and swapped in.
+    """
+
+    def __init__(self, max_bytes: int = USER_MODEL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, int, int], inference.RunModels]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[inference.RunModels]:
+        """Return the user's personal models or ``None`` if they have none."""
+        version = ModelRegistry._version(user_model_path(user_id))
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+            if entry is not None:
+                self._drop(user_id)
+            if version is None:
+                return None
+            models = inference.load_models(user_model_path(user_id))
+            self._entries[user_id] = (version, models)
+            self._bytes += models.nbytes
+            # Always keep the entry just loaded, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+            return models
+
+    def _drop(self, user_id: int) -> None:
+        _, models = self._entries.pop(user_id)
+        self._bytes -= models.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+user_models = UserModelCache()
+
+
+def user_model_path(user_id: int) -> str:
+    return os.path.join(USER_MODEL_DIR, f"{user_id}.npz")
+
+
+def _atomic_dump(obj: Any, path: str) -> None:
+    """Write ``obj`` with joblib to a temp file and atomically move it to ``path``.
+
+    Readers (and the registry) therefore only ever see a complete artifact.
+    """
+    with inference.atomic_write(path) as f:
+        joblib.dump(obj, f)
 
 
 def assign_run_type_label(run: pd.Series) -> str:
@@ -33,35 +166,190 @@ def assign_run_type_label(run: pd.Series) -> str:
         return "Easy/Recovery Run"
 
 
-def train_models(limit: int = 10000, epochs: int = 20):
-    """Fetch completed runs, train classifier & regressor for multiple epochs, and save them."""
-    os.makedirs(MODEL_DIR, exist_ok=True)
+def assign_run_type_labels(distance, average_speed, name) -> np.ndarray:
+    """Vectorized ``assign_run_type_label`` over array-likes of runs.
+
+    Uses boolean masks instead of a Python call per row and gives the same
+    label for every run.  Missing distances/speeds should already be 0 (as
+    the scalar version's ``or 0`` does) or NaN, which matches no rule.
+    """
+    distance = np.asarray(distance, dtype=float)
+    avg_speed = np.asarray(average_speed, dtype=float)
+    is_interval = (
+        pd.Series(name, dtype=object).astype(str).str.lower()
+        .str.contains("interval", regex=False, na=False).to_numpy(dtype=bool)
+    )
+    conditions = [
+        is_interval | ((distance < 3) & (avg_speed > 12)),
+        distance > 10,
+        (5 <= distance) & (distance <= 10) & (10 <= avg_speed) & (avg_speed <= 12),
+    ]
+    return np.select(conditions, ["Interval", "Long Run", "Tempo Run"], default="Easy/Recovery Run")
+
+
+def load_training_data(
+    limit: Optional[int] = None,
+    after: Optional[Dict[str, Any]] = None,
+    chunk_size: int = TRAINING_CHUNK_SIZE,
+    user_id: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[Dict[str, Any]]]:
+    """Load training features of COMPLETED runs without building ORM objects.
+
+    Rows are streamed from the database in chunks of ``chunk_size`` and copied
+    into preallocated arrays, so memory is bounded by the feature columns
+    alone.  Without ``after`` the newest ``limit`` runs are loaded; with a
+    high-water mark ``{"run_id"}`` only runs with a higher id are, including
+    backdated ones imported since.
+    ``user_id`` restricts the data to that user's runs.
+
+    Returns ``(X, names, mark)``: an ``(n, 3)`` float array ordered like
+    ``FEATURE_COLUMNS``, an object array of run names and the high-water mark
+    of the loaded rows (``None`` when nothing was loaded).
+    """
+    after_key = after["run_id"] if after else None
     db = SessionLocal()
-    runs = crud.get_completed_runs(db, limit=limit)
-    db.close()
-
-    # build dataframe
-    rows = []
-    for r in runs:
-        if None in (r.distance, r.time, r.average_speed):
-            continue
-        rows.append({
-            "distance":       r.distance,
-            "time":           r.time,
-            "average_speed":  r.average_speed,
-            "name":           r.name or ""
-        })
-    df = pd.DataFrame(rows)
-    if df.empty:
+    try:
+        n = crud.count_completed_run_features(db, after=after_key, user_id=user_id)
+        if limit is not None:
+            n = min(n, limit)
+        X = np.empty((n, len(FEATURE_COLUMNS)), dtype=float)
+        names = np.empty(n, dtype=object)
+        last_id = None
+        filled = 0
+        if n:
+            chunks = crud.stream_completed_run_features(
+                db, limit=n, after=after_key, chunk_size=chunk_size, user_id=user_id
+            )
+            for chunk in chunks:
+                # Rows committed after the count are ignored
+                rows = chunk[:n - filled]
+                if not rows:
+                    break
+                X[filled:filled + len(rows)] = [(r.distance, r.time, r.average_speed) for r in rows]
+                names[filled:filled + len(rows)] = [r.name or "" for r in rows]
+                last_id = max(last_id or 0, max(r.id for r in rows))
+                filled += len(rows)
+    finally:
+        db.close()
+
+    mark = {"run_id": last_id} if last_id else None
+    return X[:filled], names[:filled], mark
+
+
+def _one_hot(labels: np.ndarray, columns) -> np.ndarray:
+    return (labels[:, None] == np.asarray(columns)[None, :]).astype(float)
+
+
+def _feature_table(reg, target_scaler, columns) -> Dict[str, Any]:
+    """Predict (distance,time,avg_speed) for every run type in one forward pass.
+
+    The regressor input is a one-hot vector over ``columns``, so these plus the
+    all-zero vector used for unseen run types are the only possible outputs.
+    """
+    inputs = np.vstack([np.eye(len(columns)), np.zeros((1, len(columns)))])
+    outputs = target_scaler.inverse_transform(reg.predict(inputs))
+    rows = [
+        {"distance": float(out[0]), "time": int(out[1]), "average_speed": float(out[2])}
+        for out in outputs
+    ]
+    return {"by_type": dict(zip(columns, rows[:-1])), "unknown": rows[-1]}
+
+
+def _load_regressor(path: str) -> Dict[str, Any]:
+    """Load a regressor package, adding the feature table for artifacts saved without one."""
+    pkg = joblib.load(path)
+    if "feature_table" not in pkg:
+        pkg["feature_table"] = _feature_table(pkg["model"], pkg["target_scaler"], pkg["onehot_columns"])
+    return pkg
+
+
+def _update_models(
+    limit: Optional[int],
+    epochs: int,
+    progress: Optional[Callable[[str, int, int, float], None]],
+) -> Optional[Dict[str, Any]]:
+    """Update the saved models with ``partial_fit`` on runs newer than their high-water mark.
+
+    Scalers and label encoder are kept as trained.  Returns ``None`` when a
+    full retrain is required instead: no usable saved models, or new runs
+    introduce a run type the models have never seen.
+    """
+    if not (os.path.exists(CLASSIF_PATH) and os.path.exists(REGRESS_PATH)):
+        return None
+    # Load private copies: the registry's instances are in use by requests
+    clf_pkg = joblib.load(CLASSIF_PATH)
+    reg_pkg = joblib.load(REGRESS_PATH)
+    mark = clf_pkg.get("trained_through")
+    if mark is None:
+        return None
+
+    X, names, new_mark = load_training_data(limit=limit, after=mark)
+    summary = {"mode": "incremental", "samples": int(len(X))}
+    if not len(X):
+        print("No new runs since the last training")
+        return summary
+
+    labels = assign_run_type_labels(X[:, 0], X[:, 2], names)
+    le = clf_pkg["label_encoder"]
+    columns = reg_pkg["onehot_columns"]
+    new_types = set(labels)
+    if not new_types <= set(le.classes_) or not new_types <= set(columns):
+        print(f"New run types {sorted(new_types - set(le.classes_))}, full retrain required")
+        return None
+
+    clf = clf_pkg["model"]
+    # warm_start makes sklearn demand every class in each batch; partial_fit
+    # only needs the classes to be known already
+    clf.warm_start = False
+    Xc_s = clf_pkg["scaler"].transform(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    yc = le.transform(labels)
+    print(f"Updating classifier with {len(X)} new runs for {epochs} epochs...")
+    for epoch in range(1, epochs + 1):
+        clf.partial_fit(Xc_s, yc)
+        print(f" Epoch {epoch}/{epochs} – loss: {clf.loss_:.4f}")
+        if progress:
+            progress("classifier", epoch, epochs, float(clf.loss_))
+
+    reg = reg_pkg["model"]
+    Xr = _one_hot(labels, columns)
+    yr_s = reg_pkg["target_scaler"].transform(X)
+    print(f"Updating regressor with {len(X)} new runs for {epochs} epochs...")
+    for epoch in range(1, epochs + 1):
+        reg.partial_fit(Xr, yr_s)
+        print(f" Epoch {epoch}/{epochs} – loss: {reg.loss_:.4f}")
+        if progress:
+            progress("regressor", epoch, epochs, float(reg.loss_))
+
+    clf_pkg["trained_through"] = new_mark
+    reg_pkg["feature_table"] = _feature_table(reg, reg_pkg["target_scaler"], columns)
+    _atomic_dump(clf_pkg, CLASSIF_PATH)
+    _atomic_dump(reg_pkg, REGRESS_PATH)
+    inference.export_models(clf_pkg, reg_pkg, MODELS_NPZ_PATH)
+    print(f"Updated models → {CLASSIF_PATH}, {REGRESS_PATH}")
+
+    summary.update({
+        "classifier_loss": float(clf.loss_),
+        "regressor_loss": float(reg.loss_),
+    })
+    return summary
+
+
+def _prepare_datasets(limit: Optional[int], user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Load completed runs and build the scaled train/validation splits for both models."""
+    # sklearn is imported inside the training functions so serving predictions never loads it
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+    X, names, mark = load_training_data(limit=limit, user_id=user_id)
+    if not len(X):
         raise RuntimeError("No data to train on")
 
-    df["run_type"] = df.apply(assign_run_type_label, axis=1)
+    labels = assign_run_type_labels(X[:, 0], X[:, 2], names)
 
     # --- CLASSIFIER ---
-    Xc = df[["distance", "time", "average_speed"]]
-    yc = df["run_type"]
-    le = LabelEncoder().fit(yc)
-    y_enc = le.transform(yc)
+    Xc = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    le = LabelEncoder().fit(labels)
+    y_enc = le.transform(labels)
 
     # ensure enough samples per class
     unique, counts = np.unique(y_enc, return_counts=True)
@@ -75,6 +363,104 @@ def train_models(limit: int = 10000, epochs: int = 20):
         Xc_s, y_enc, test_size=0.2, random_state=42, stratify=y_enc
     )
 
+    # --- REGRESSOR ---
+    onehot_columns = np.unique(labels).tolist()
+    Xr = _one_hot(labels, onehot_columns)
+    scaler_reg = StandardScaler().fit(X)
+    yr_s = scaler_reg.transform(X)
+    Xr_tr, Xr_te, yr_tr, yr_te = train_test_split(Xr, yr_s, test_size=0.2, random_state=42)
+
+    return {
+        "samples": int(len(X)),
+        "mark": mark,
+        "label_encoder": le,
+        "scaler_clf": scaler_clf,
+        "classifier": (Xc_tr, Xc_te, yc_tr, yc_te),
+        "onehot_columns": onehot_columns,
+        "scaler_reg": scaler_reg,
+        "regressor": (Xr_tr, Xr_te, yr_tr, yr_te),
+    }
+
+
+def _packages(data: Dict[str, Any], clf, reg) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Bundle trained models with their preprocessing as saved by ``train_models``."""
+    clf_pkg = {
+        "model": clf,
+        "scaler": data["scaler_clf"],
+        "label_encoder": data["label_encoder"],
+        "trained_through": data["mark"],
+    }
+    columns = data["onehot_columns"]
+    reg_pkg = {
+        "model": reg,
+        "target_scaler": data["scaler_reg"],
+        "onehot_columns": columns,
+        "feature_table": _feature_table(reg, data["scaler_reg"], columns),
+    }
+    return clf_pkg, reg_pkg
+
+
+def _save_models(data: Dict[str, Any], clf, reg) -> None:
+    """Write both joblib packages and the NumPy export for freshly trained models."""
+    clf_pkg, reg_pkg = _packages(data, clf, reg)
+    _atomic_dump(clf_pkg, CLASSIF_PATH)
+    print(f"Saved classifier → {CLASSIF_PATH}")
+    _atomic_dump(reg_pkg, REGRESS_PATH)
+    print(f"Saved regressor → {REGRESS_PATH}")
+
+    inference.export_models(clf_pkg, reg_pkg, MODELS_NPZ_PATH)
+    print(f"Exported models → {MODELS_NPZ_PATH}")
+
+
+def train_models(
+    limit: int = 10000,
+    epochs: int = 20,
+    progress: Optional[Callable[[str, int, int, float], None]] = None,
+    incremental: bool = False,
+) -> Dict[str, Any]:
+    """Fetch completed runs, train classifier & regressor for multiple epochs, and save them.
+
+    ``progress`` is called after every epoch as ``progress(model, epoch, epochs, loss)``
+    with ``model`` being ``"classifier"`` or ``"regressor"``.  With
+    ``incremental`` only runs newer than the saved models are used to update
+    them; a full retrain still happens when that is not possible.  Returns a
+    short summary of the training run.
+    """
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    if incremental:
+        summary = _update_models(limit, epochs, progress)
+        if summary is not None:
+            return summary
+        print("Falling back to a full retrain")
+
+    data = _prepare_datasets(limit)
+    clf, reg, reg_mse = _fit_models(data, epochs, progress)
+    _save_models(data, clf, reg)
+
+    return {
+        "mode": "full",
+        "samples": data["samples"],
+        "classifier_loss": float(clf.loss_),
+        "regressor_loss": float(reg.loss_),
+        "regressor_mse": reg_mse,
+    }
+
+
+def _fit_models(
+    data: Dict[str, Any],
+    epochs: int,
+    progress: Optional[Callable[[str, int, int, float], None]],
+) -> Tuple[Any, Any, float]:
+    """Train the classifier and regressor on ``_prepare_datasets`` output.
+
+    Returns ``(classifier, regressor, regressor validation MSE)``.
+    """
+    from sklearn.neural_network import MLPClassifier, MLPRegressor
+    from sklearn.metrics import classification_report, mean_squared_error
+
+    le = data["label_encoder"]
+    # --- CLASSIFIER ---
+    Xc_tr, Xc_te, yc_tr, yc_te = data["classifier"]
     clf = MLPClassifier(
         hidden_layer_sizes=(100, 50),
         max_iter=1,
@@ -85,24 +471,17 @@ def train_models(limit: int = 10000, epochs: int = 20):
     for epoch in range(1, epochs + 1):
         clf.fit(Xc_tr, yc_tr)
         print(f" Epoch {epoch}/{epochs} – loss: {clf.loss_:.4f}")
+        if progress:
+            progress("classifier", epoch, epochs, float(clf.loss_))
 
     preds = clf.predict(Xc_te)
     # Get the actual classes present in the test data
     test_classes = np.unique(yc_te)
     test_class_names = le.inverse_transform(test_classes)
     print(classification_report(yc_te, preds, target_names=test_class_names, zero_division=0))
-    joblib.dump({"model": clf, "scaler": scaler_clf, "label_encoder": le}, CLASSIF_PATH)
-    print(f"Saved classifier → {CLASSIF_PATH}")
 
     # --- REGRESSOR ---
-    oh = pd.get_dummies(df["run_type"])
-    Xr = oh.values
-    yr = df[["distance", "time", "average_speed"]].values
-
-    scaler_reg = StandardScaler().fit(yr)
-    yr_s = scaler_reg.transform(yr)
-    Xr_tr, Xr_te, yr_tr, yr_te = train_test_split(Xr, yr_s, test_size=0.2, random_state=42)
-
+    Xr_tr, Xr_te, yr_tr, yr_te = data["regressor"]
     reg = MLPRegressor(
         hidden_layer_sizes=(50, 25),
         max_iter=1,
@@ -113,49 +492,261 @@ def train_models(limit: int = 10000, epochs: int = 20):
     for epoch in range(1, epochs + 1):
         reg.fit(Xr_tr, yr_tr)
         print(f" Epoch {epoch}/{epochs} – loss: {reg.loss_:.4f}")
+        if progress:
+            progress("regressor", epoch, epochs, float(reg.loss_))
 
     yr_pred = reg.predict(Xr_te)
-    print("Regressor MSE:", mean_squared_error(yr_te, yr_pred))
-    joblib.dump({
-        "model": reg,
-        "target_scaler": scaler_reg,
-        "onehot_columns": oh.columns.tolist()
-    }, REGRESS_PATH)
-    print(f"Saved regressor → {REGRESS_PATH}")
+    reg_mse = float(mean_squared_error(yr_te, yr_pred))
+    print("Regressor MSE:", reg_mse)
+
+    return clf, reg, reg_mse
 
 
-def predict_run_type(run_features: dict) -> str:
-    """Load classifier and predict run_type (fallback to heuristic)."""
-    if not os.path.exists(CLASSIF_PATH):
-        return assign_run_type_label(pd.Series(run_features))
+def train_user_models(
+    user_id: int,
+    limit: int = 10000,
+    epochs: int = 20,
+    progress: Optional[Callable[[str, int, int, float], None]] = None,
+    min_runs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Train a personal classifier & regressor on one user's completed runs.
+
+    Only the NumPy export is written, to ``user_model_path(user_id)``.  Users
+    with fewer than ``min_runs`` (default ``USER_MODEL_MIN_RUNS``) usable runs
+    keep being served by the global model.
+    """
+    min_runs = USER_MODEL_MIN_RUNS if min_runs is None else min_runs
+    db = SessionLocal()
+    try:
+        available = crud.count_completed_run_features(db, user_id=user_id)
+    finally:
+        db.close()
+    if available < min_runs:
+        raise RuntimeError(
+            f"Not enough runs for a personal model: {available} of {min_runs} required"
+        )
+
+    data = _prepare_datasets(limit, user_id=user_id)
+    clf, reg, reg_mse = _fit_models(data, epochs, progress)
+
+    os.makedirs(USER_MODEL_DIR, exist_ok=True)
+    path = user_model_path(user_id)
+    inference.export_models(*_packages(data, clf, reg), path)
+    print(f"Exported personal models → {path}")
+
+    return {
+        "mode": "user",
+        "user_id": user_id,
+        "samples": data["samples"],
+        "classifier_loss": float(clf.loss_),
+        "regressor_loss": float(reg.loss_),
+        "regressor_mse": reg_mse,
+    }
+
+
+DEFAULT_SEARCH_GRID = {
+    "classifier": {
+        "hidden_layer_sizes": [(50,), (100, 50), (100, 50, 25)],
+        "learning_rate_init": [0.001, 0.01],
+        "epochs": [20, 50],
+    },
+    "regressor": {
+        "hidden_layer_sizes": [(25,), (50, 25)],
+        "learning_rate_init": [0.001, 0.01],
+        "epochs": [20, 50],
+    },
+}
+
+
+def _fit_candidate(kind: str, params: Dict[str, Any], split: tuple, deadline: float) -> Dict[str, Any]:
+    """Train one search candidate and score it on the validation split.
+
+    Runs in a worker process.  Training stops early once ``deadline`` (a
+    ``time.time()`` value) has passed, so the search respects its budget.
+    """
+    from sklearn.neural_network import MLPClassifier, MLPRegressor
+    from sklearn.metrics import accuracy_score, mean_squared_error
+
+    started = time.time()
+    X_tr, X_val, y_tr, y_val = split
+    model_cls = MLPClassifier if kind == "classifier" else MLPRegressor
+    model = model_cls(
+        hidden_layer_sizes=params["hidden_layer_sizes"],
+        learning_rate_init=params["learning_rate_init"],
+        max_iter=1,
+        warm_start=True,
+        random_state=42,
+    )
+    epochs_trained = 0
+    for _ in range(params["epochs"]):
+        if epochs_trained and time.time() > deadline:
+            break
+        model.fit(X_tr, y_tr)
+        epochs_trained += 1
+
+    result = {
+        "kind": kind,
+        **params,
+        "epochs_trained": epochs_trained,
+        "loss": float(model.loss_),
+        "seconds": round(time.time() - started, 3),
+    }
+    if kind == "classifier":
+        result["val_accuracy"] = float(accuracy_score(y_val, model.predict(X_val)))
+    else:
+        result["val_mse"] = float(mean_squared_error(y_val, model.predict(X_val)))
+    return {"metrics": result, "model": model}
+
+
+def _grid_candidates(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def search_models(
+    limit: int = 10000,
+    grid: Optional[Dict[str, Dict[str, List[Any]]]] = None,
+    budget_seconds: float = 300,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[str, int, int, float], None]] = None,
+) -> Dict[str, Any]:
+    """Grid-search classifier and regressor architectures across a process pool.
+
+    Every combination of ``hidden_layer_sizes``, ``learning_rate_init`` and
+    ``epochs`` in ``grid`` (default ``DEFAULT_SEARCH_GRID``) is trained on all
+    cores, classifier and regressor candidates side by side.  Candidates still
+    queued when ``budget_seconds`` runs out are cancelled and running ones
+    stop after their current epoch.  The best classifier (validation accuracy)
+    and regressor (validation MSE) are saved like ``train_models`` does;
+    ``progress`` is called as ``progress(model, finished, total, loss)`` for
+    each finished candidate.  Returns the metrics of every candidate.
+    """
+    deadline = time.time() + budget_seconds
+    grid = grid or DEFAULT_SEARCH_GRID
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    data = _prepare_datasets(limit)
+
+    candidates = {kind: _grid_candidates(grid[kind]) for kind in ("classifier", "regressor")}
+    # Interleave so classifier and regressor candidates train concurrently
+    jobs = [
+        job
+        for pair in itertools.zip_longest(
+            *([(kind, params) for params in candidates[kind]] for kind in candidates)
+        )
+        for job in pair
+        if job is not None
+    ]
+    finished: Dict[str, List[Dict[str, Any]]] = {"classifier": [], "regressor": []}
+    print(f"Searching {len(jobs)} candidates with a {budget_seconds}s budget...")
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=_spawn) as pool:
+        pending = {
+            pool.submit(_fit_candidate, kind, params, data[kind], deadline)
+            for kind, params in jobs
+        }
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                for future in pending:
+                    future.cancel()
+                # Running candidates stop after their current epoch
+                remaining = None
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                candidate = future.result()
+                metrics = candidate["metrics"]
+                finished[metrics["kind"]].append(candidate)
+                print(f" {metrics}")
+                if progress:
+                    kind = metrics["kind"]
+                    progress(kind, len(finished[kind]), len(candidates[kind]), metrics["loss"])
+
+    if not finished["classifier"] or not finished["regressor"]:
+        raise RuntimeError("Search budget too small: no candidate finished for both models")
+
+    best_clf = max(finished["classifier"], key=lambda c: (c["metrics"]["val_accuracy"], -c["metrics"]["loss"]))
+    best_reg = min(finished["regressor"], key=lambda c: c["metrics"]["val_mse"])
+    _save_models(data, best_clf["model"], best_reg["model"])
+
+    return {
+        "mode": "search",
+        "samples": data["samples"],
+        "candidates": [c["metrics"] for kind in finished for c in finished[kind]],
+        "best": {"classifier": best_clf["metrics"], "regressor": best_reg["metrics"]},
+        "classifier_loss": best_clf["metrics"]["loss"],
+        "regressor_loss": best_reg["metrics"]["loss"],
+        "regressor_mse": best_reg["metrics"]["val_mse"],
+    }
+
+
+def _engine(user_id: Optional[int]) -> Optional[inference.RunModels]:
+    """Return the user's personal models if they have any, else the global NumPy export."""
+    if user_id is not None:
+        engine = user_models.get(user_id)
+        if engine is not None:
+            return engine
+    return model_registry.get(MODELS_NPZ_PATH, loader=inference.load_models)
+
+
+def predict_run_types(runs_features: List[dict], user_id: Optional[int] = None) -> List[str]:
+    """Predict the run_type of many runs in one forward pass (fallback to heuristic).
+
+    Uses ``user_id``'s personal models when trained, then the global NumPy
+    export, then the joblib classifier.  Missing feature values are treated
+    as 0, matching the heuristic.
+    """
+    if not runs_features:
+        return []
+
+    X = np.array(
+        [[f.get(col) or 0 for col in FEATURE_COLUMNS] for f in runs_features],
+        dtype=float,
+    )
+    engine = _engine(user_id)
+    if engine is not None:
+        return engine.predict_run_types(X)
+
+    pkg = model_registry.get(CLASSIF_PATH)
+    if pkg is None:
+        return assign_run_type_labels(
+            [f.get("distance", 0) or 0 for f in runs_features],
+            [f.get("average_speed", 0) or 0 for f in runs_features],
+            [f.get("name", "") for f in runs_features],
+        ).tolist()
 
-    pkg = joblib.load(CLASSIF_PATH)
     clf = pkg["model"]
     scl = pkg["scaler"]
     le  = pkg["label_encoder"]
 
-    X = pd.DataFrame([run_features], columns=["distance", "time", "average_speed"])
-    Xs = scl.transform(X)
-    return le.inverse_transform(clf.predict(Xs))[0]
+    Xs = scl.transform(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    return le.inverse_transform(clf.predict(Xs)).tolist()
 
 
-def predict_run_features(run_type: str) -> Dict[str, Any]:
-    """Load regressor and predict (distance,time,avg_speed) for a run_type."""
-    if not os.path.exists(REGRESS_PATH):
-        raise RuntimeError("Models not trained yet")
+def predict_run_type(run_features: dict, user_id: Optional[int] = None) -> str:
+    """Predict run_type for a single run with the cached classifier (fallback to heuristic)."""
+    return predict_run_types([run_features], user_id=user_id)[0]
+
 
-    pkg = joblib.load(REGRESS_PATH)
-    reg     = pkg["model"]
-    scaler  = pkg["target_scaler"]
-    columns = pkg["onehot_columns"]
+def predict_run_features(run_type: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+    """Return the (distance,time,avg_speed) the regressor predicts for a run_type.
 
-    vec = np.zeros(len(columns))
-    if run_type in columns:
-        vec[columns.index(run_type)] = 1
+    Served from the table precomputed at train time, from ``user_id``'s
+    personal models when trained; unseen run types get the prediction for an
+    all-zero input, as before.
+    """
+    engine = _engine(user_id)
+    if engine is not None:
+        return engine.predict_run_features(run_type)
+
+    pkg = model_registry.get(REGRESS_PATH, loader=_load_regressor)
+    if pkg is None:
+        raise RuntimeError("Models not trained yet")
 
-    scaled_out = reg.predict([vec])[0]
-    out = scaler.inverse_transform([scaled_out])[0]
-    return {"distance": float(out[0]), "time": int(out[1]), "average_speed": float(out[2])}
+    table = pkg["feature_table"]
+    # Copy: callers adjust the recommendation in place
+    return dict(table["by_type"].get(run_type, table["unknown"]))
 
 
 def _format_duration(seconds: int) -> str:
@@ -167,16 +758,19 @@ def _format_duration(seconds: int) -> str:
     return f"{m}m"
 
 
-def generate_training_plan(run_type: str, distance: float = 10.0) -> Dict[str, Any]:
+def generate_training_plan(
+    run_type: str, distance: float = 10.0, user_id: Optional[int] = None
+) -> Dict[str, Any]:
     """Return a structured training plan based on the run type.
 
     If ``run_type`` is "Interval" a list of interval segments is returned.  For
     other types a general recommendation containing distance, target pace and
     duration is provided.  ``distance`` can be used to override the predicted
-    distance for non interval runs.
+    distance for non interval runs.  ``user_id`` selects that user's personal
+    models when they have been trained.
     """
 
-    rec = predict_run_features(run_type)
+    rec = predict_run_features(run_type, user_id=user_id)
     # Allow caller supplied distance to override the prediction for steady runs
     if distance:
         rec["distance"] = distance
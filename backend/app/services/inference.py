@@ -0,0 +1,145 @@
+"""Pure-NumPy inference for the exported run models.
+
+``train_models`` writes the classifier and regressor weights, their scalers
+and the label classes into one ``.npz`` file.  Loading it needs neither
+sklearn nor unpickling, and a forward pass is a handful of matrix products.
+"""
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, BinaryIO
+
+import numpy as np
+
+ACTIVATIONS = {
+    "identity": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "logistic": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class MLP:
+    """Forward pass of a fitted sklearn multi-layer perceptron."""
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray], activation: str, out_activation: str):
+        self.weights = weights
+        self.biases = biases
+        self.activation = ACTIVATIONS[activation]
+        self.out_activation = _softmax if out_activation == "softmax" else ACTIVATIONS[out_activation]
+
+    def forward(self, X: np.ndarray) -> np.ndarray:
+        a = X
+        last = len(self.weights) - 1
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            a = a @ W + b
+            a = self.out_activation(a) if i == last else self.activation(a)
+        return a
+
+
+class RunModels:
+    """Run-type classifier and feature regressor loaded from an exported ``.npz``."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        # Approximate resident size, used to bound caches of many models
+        self.nbytes = sum(a.nbytes for a in arrays.values())
+        self.classifier = _mlp_from_arrays(arrays, "clf")
+        self.feature_mean = arrays["clf_mean"]
+        self.feature_scale = arrays["clf_scale"]
+        self.classes = arrays["clf_classes"]
+
+        regressor = _mlp_from_arrays(arrays, "reg")
+        columns = arrays["reg_columns"].tolist()
+        # One-hot rows for every known run type plus the all-zero "unknown" input
+        inputs = np.vstack([np.eye(len(columns)), np.zeros((1, len(columns)))])
+        outputs = regressor.forward(inputs) * arrays["reg_target_scale"] + arrays["reg_target_mean"]
+        rows = [
+            {"distance": float(out[0]), "time": int(out[1]), "average_speed": float(out[2])}
+            for out in outputs
+        ]
+        self.feature_table = {"by_type": dict(zip(columns, rows[:-1])), "unknown": rows[-1]}
+
+    def predict_run_types(self, X: np.ndarray) -> List[str]:
+        """Predict run types for an ``(n, 3)`` feature matrix."""
+        if len(self.classes) == 1:
+            return [str(self.classes[0])] * len(X)
+        out = self.classifier.forward((X - self.feature_mean) / self.feature_scale)
+        if out.shape[1] == 1:
+            idx = (out[:, 0] > 0.5).astype(int)
+        else:
+            idx = out.argmax(axis=1)
+        return self.classes[idx].tolist()
+
+    def predict_run_features(self, run_type: str) -> Dict[str, Any]:
+        return dict(self.feature_table["by_type"].get(run_type, self.feature_table["unknown"]))
+
+
+def _mlp_from_arrays(arrays: Dict[str, np.ndarray], prefix: str) -> MLP:
+    n_layers = int(arrays[f"{prefix}_n_layers"])
+    return MLP(
+        [arrays[f"{prefix}_W{i}"] for i in range(n_layers)],
+        [arrays[f"{prefix}_b{i}"] for i in range(n_layers)],
+        str(arrays[f"{prefix}_activation"]),
+        str(arrays[f"{prefix}_out_activation"]),
+    )
+
+
+def _mlp_arrays(model, prefix: str) -> Dict[str, np.ndarray]:
+    arrays = {
+        f"{prefix}_n_layers": np.array(len(model.coefs_)),
+        f"{prefix}_activation": np.array(model.activation),
+        f"{prefix}_out_activation": np.array(model.out_activation_),
+    }
+    for i, (W, b) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f"{prefix}_W{i}"] = W
+        arrays[f"{prefix}_b{i}"] = b
+    return arrays
+
+
+def export_models(clf_pkg: Dict[str, Any], reg_pkg: Dict[str, Any], path: str) -> None:
+    """Write the classifier/regressor packages produced by ``train_models`` to one ``.npz``.
+
+    The file is written to a temp name and moved into place atomically.
+    """
+    clf = clf_pkg["model"]
+    arrays = {
+        **_mlp_arrays(clf, "clf"),
+        "clf_mean": clf_pkg["scaler"].mean_,
+        "clf_scale": clf_pkg["scaler"].scale_,
+        "clf_classes": np.array(clf_pkg["label_encoder"].inverse_transform(clf.classes_), dtype=str),
+        **_mlp_arrays(reg_pkg["model"], "reg"),
+        "reg_target_mean": reg_pkg["target_scaler"].mean_,
+        "reg_target_scale": reg_pkg["target_scaler"].scale_,
+        "reg_columns": np.array(reg_pkg["onehot_columns"], dtype=str),
+    }
+    with atomic_write(path) as f:
+        np.savez(f, **arrays)
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """Write to a temp file next to ``path`` and move it into place on success.
+
+    Unlike ``mkstemp``'s 0600 files, the temp file gets the mode the umask
+    allows, so readers running as other users can load the artifact.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "xb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_models(path: str) -> RunModels:
+    """Load an exported ``.npz`` fully into memory."""
+    with np.load(path, allow_pickle=False) as npz:
+        return RunModels({key: npz[key] for key in npz.files})
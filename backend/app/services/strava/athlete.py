@@ -1,7 +1,13 @@
-import os
-import requests
+from .client import get_client
 
-def fetch_athlete_zones(token):
+
+async def _get(path, token, params=None):
+    resp = await get_client().get(path, headers={"Authorization": f"Bearer {token}"}, params=params)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def fetch_athlete_zones(token):
     """
     Fetch the athlete's heart rate and power zones from Strava.
 
@@ -17,35 +23,34 @@ def fetch_athlete_zones(token):
 
     Raises
     ------
-    requests.exceptions.HTTPError
+    httpx.HTTPStatusError
         If the Strava API call fails.
+    httpx.TimeoutException
+        If Strava does not answer within the configured timeouts.
     """
-    url = "https://www.strava.com/api/v3/athlete/zones"
-    headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return resp.json()
+    return await _get("/athlete/zones", token)
 
 
-def fetch_athlete_stats(token, athlete_id):
+async def fetch_athlete_stats(token, athlete_id):
     """Fetch overall stats for the athlete."""
-    url = f"https://www.strava.com/api/v3/athletes/{athlete_id}/stats"
-    headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return resp.json()
+    return await _get(f"/athletes/{athlete_id}/stats", token)
 
 
-def fetch_athlete_activities(token, page=1, per_page=30):
-    """Fetch athlete activities list."""
-    url = "https://www.strava.com/api/v3/athlete/activities"
-    headers = {"Authorization": f"Bearer {token}"}
+async def fetch_athlete_activities(token, page=1, per_page=30, after=None, before=None):
+    """
+    Fetch one page of the athlete's activity summaries.
+
+    Newest first by default; with ``after`` (epoch seconds) Strava returns the
+    activities that started later, oldest first.
+    """
     params = {"page": page, "per_page": per_page}
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-    return resp.json()
+    if after is not None:
+        params["after"] = after
+    if before is not None:
+        params["before"] = before
+    return await _get("/athlete/activities", token, params)
 
-def fetch_activity_details(activity_id, token, include_all_efforts=True):
+async def fetch_activity_details(activity_id, token, include_all_efforts=True):
     """
     Fetch the full details of a single activity (including all segment efforts).
 
@@ -65,18 +70,13 @@ def fetch_activity_details(activity_id, token, include_all_efforts=True):
 
     Raises
     ------
-    requests.exceptions.HTTPError
+    httpx.HTTPStatusError
         If the Strava API call fails (e.g. 401, 404, etc.).
     """
-    url = f"https://www.strava.com/api/v3/activities/{activity_id}"
-    headers = {"Authorization": f"Bearer {token}"}
     params = {"include_all_efforts": str(include_all_efforts).lower()}
+    return await _get(f"/activities/{activity_id}", token, params)
 
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-    return resp.json()
-
-def fetch_latest_run(token, before=None, after=None, page=1, per_page=10):
+async def fetch_latest_run(token, before=None, after=None, page=1, per_page=10):
     """
     Fetch your most recent Run activity.
     
@@ -102,11 +102,9 @@ def fetch_latest_run(token, before=None, after=None, page=1, per_page=10):
     ------
     RuntimeError
         If no recent Run is found.
-    HTTPError
+    httpx.HTTPStatusError
         If the Strava API call fails (e.g. 401/403/500).
     """
-    url = "https://www.strava.com/api/v3/athlete/activities"
-    headers = {"Authorization": f"Bearer {token}"}
     params = {
         "before": before or "",
         "after":  after or "",
@@ -114,10 +112,7 @@ def fetch_latest_run(token, before=None, after=None, page=1, per_page=10):
         "per_page": per_page
     }
 
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-
-    activities = resp.json()
+    activities = await _get("/athlete/activities", token, params)
     for act in activities:
         if act.get("type") == "Run":
             return act
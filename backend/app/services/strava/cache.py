@@ -0,0 +1,93 @@
+"""Stale-while-revalidate reads of the per-user Strava cache tables.
+
+Each cache kind has its own time to live.  A fresh entry is returned as is; a
+stale one is returned immediately while one background task per (kind, user)
+fetches a replacement.  Only a user without any entry waits for Strava, and
+concurrent requests of that user share a single fetch.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_crud, models
+from app.database import AsyncSessionLocal
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODELS = {
+    "zones": models.StravaHeartRateZoneCache,
+    "stats": models.StravaStatsCache,
+    "activities": models.StravaActivitiesCache,
+}
+# Seconds an entry is served without a refresh; zones rarely change, activities often
+CACHE_TTLS = {
+    "zones": timedelta(seconds=int(os.getenv("STRAVA_ZONES_CACHE_TTL", "86400"))),
+    "stats": timedelta(seconds=int(os.getenv("STRAVA_STATS_CACHE_TTL", "3600"))),
+    "activities": timedelta(seconds=int(os.getenv("STRAVA_ACTIVITIES_CACHE_TTL", "900"))),
+}
+
+# Fetches from Strava in progress, keyed by (kind, user_id)
+flights = SingleFlight()
+# Running background refreshes; also keeps the tasks referenced until they finish
+_refreshes: Dict[Tuple[str, int], asyncio.Task] = {}
+
+
+def is_fresh(entry, kind: str) -> bool:
+    fetched_at = entry.fetched_at
+    if fetched_at is None:
+        return False
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - fetched_at < CACHE_TTLS[kind]
+
+
+async def get_or_fetch(db: AsyncSession, kind: str, user_id: int, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Return the user's cached ``kind`` data, calling ``fetch`` inline only when
+    nothing is cached and in the background when the entry is stale.
+    """
+    entry = await async_crud.get_cache(db, CACHE_MODELS[kind], user_id)
+    if entry is None:
+        return await flights.do((kind, user_id), lambda: _fetch_and_store(kind, user_id, fetch))
+    if not is_fresh(entry, kind):
+        _schedule_refresh(kind, user_id, fetch)
+    return entry.data
+
+
+def _schedule_refresh(kind: str, user_id: int, fetch: Callable[[], Awaitable[Any]]) -> None:
+    key = (kind, user_id)
+    if key in _refreshes or flights.in_flight(key):
+        return
+    task = asyncio.create_task(_refresh(kind, user_id, fetch))
+    _refreshes[key] = task
+    task.add_done_callback(lambda _: _refreshes.pop(key, None))
+
+
+async def _fetch_and_store(kind: str, user_id: int, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    data = await fetch()
+    # Its own session: the fetch is shared and may outlive the request that started it
+    async with AsyncSessionLocal() as db:
+        await async_crud.store_cache(db, CACHE_MODELS[kind], user_id, data)
+    return data
+
+
+async def _refresh(kind: str, user_id: int, fetch: Callable[[], Awaitable[Any]]) -> None:
+    try:
+        await flights.do((kind, user_id), lambda: _fetch_and_store(kind, user_id, fetch))
+    except Exception:
+        # The stale entry keeps being served; the next request schedules another try
+        logger.exception("Refreshing Strava %s cache of user %s failed", kind, user_id)
+
+
+async def cancel_refreshes() -> None:
+    """Cancel background refreshes and shared fetches still running, e.g. on shutdown."""
+    tasks = list(_refreshes.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await flights.cancel()
@@ -0,0 +1,45 @@
+"""Shared HTTP client for the Strava API.
+
+One ``httpx.AsyncClient`` serves every request so connections (and their TLS
+sessions) are kept alive and reused.  It is created on first use and closed
+by the application lifespan.
+"""
+import importlib.util
+import os
+
+import httpx
+
+STRAVA_API_URL = os.getenv("STRAVA_API_URL", "https://www.strava.com/api/v3")
+# Seconds to establish a connection and to wait for each read of a response
+CONNECT_TIMEOUT = float(os.getenv("STRAVA_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("STRAVA_READ_TIMEOUT", "15"))
+MAX_CONNECTIONS = int(os.getenv("STRAVA_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("STRAVA_MAX_KEEPALIVE_CONNECTIONS", "10"))
+# httpx negotiates HTTP/2 only when the optional ``h2`` package is installed
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=STRAVA_API_URL,
+            http2=HTTP2,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,88 @@
+"""Concurrent backfill of detailed Strava activity payloads.
+
+Requests run in parallel up to a configurable limit.  Rate limiting (429),
+server errors and dropped connections are retried with jittered exponential
+backoff.  Each payload is stored as soon as it arrives, so a backfill that
+stops half way resumes with the activities that still lack details.
+"""
+import asyncio
+import logging
+import os
+import random
+from typing import Dict, Iterable, List
+
+import httpx
+
+from app import async_crud
+from app.database import AsyncSessionLocal
+from app.services.strava.athlete import fetch_activity_details
+
+logger = logging.getLogger(__name__)
+
+DETAIL_CONCURRENCY = int(os.getenv("STRAVA_DETAIL_CONCURRENCY", "8"))
+DETAIL_MAX_RETRIES = int(os.getenv("STRAVA_DETAIL_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = float(os.getenv("STRAVA_RETRY_BASE_DELAY", "1"))  # seconds
+RETRY_MAX_DELAY = 60.0
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    # "Full jitter": spreads out retries of requests that failed together
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def fetch_details_with_retry(activity_id: int, token: str) -> dict:
+    """``fetch_activity_details`` retried up to ``DETAIL_MAX_RETRIES`` times on transient errors."""
+    for attempt in range(DETAIL_MAX_RETRIES + 1):
+        try:
+            return await fetch_activity_details(activity_id, token)
+        except Exception as e:
+            if attempt == DETAIL_MAX_RETRIES or not _is_transient(e):
+                raise
+            delay = _retry_delay(attempt, e)
+            logger.info("Retrying details of activity %s in %.1fs after %r", activity_id, delay, e)
+            await asyncio.sleep(delay)
+
+
+async def fetch_activity_details_batch(
+    user_id: int,
+    token: str,
+    activity_ids: Iterable[int],
+    concurrency: int | None = None,
+) -> Dict[str, object]:
+    """
+    Fetch and store the details of ``activity_ids`` with at most ``concurrency``
+    requests in flight.
+
+    Returns the ids stored and the error message of each id that failed; one
+    failure does not stop the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency or DETAIL_CONCURRENCY)
+    fetched: List[int] = []
+    failed: Dict[int, str] = {}
+
+    async def fetch_one(activity_id: int) -> None:
+        try:
+            async with semaphore:
+                details = await fetch_details_with_retry(activity_id, token)
+            # A short session per result: concurrent tasks cannot share one AsyncSession
+            async with AsyncSessionLocal() as db:
+                await async_crud.store_strava_activity_details(db, user_id, activity_id, details)
+        except Exception as e:
+            logger.warning("Fetching details of activity %s failed: %r", activity_id, e)
+            failed[activity_id] = str(e) or type(e).__name__
+        else:
+            fetched.append(activity_id)
+
+    await asyncio.gather(*(fetch_one(activity_id) for activity_id in activity_ids))
+    return {"fetched": fetched, "failed": failed}
@@ -0,0 +1,41 @@
+"""Incremental sync of a user's Strava activities into ``strava_activities``.
+
+The first sync pages through the whole history; later ones only ask Strava
+for activities that started after the stored per-user cursor.  Pages are
+requested oldest first and the cursor advances after each stored page, so an
+interrupted sync resumes where it stopped.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_crud, crud
+from app.services.strava.athlete import fetch_athlete_activities
+
+SYNC_PAGE_SIZE = 200  # Strava's maximum ``per_page``
+
+
+def _epoch(start_date: str) -> int:
+    return int(crud.parse_strava_datetime(start_date).timestamp())
+
+
+async def sync_activities(db: AsyncSession, user_id: int, token: str, per_page: int | None = None) -> dict:
+    """
+    Fetch and store the activities of ``user_id`` newer than their sync cursor.
+
+    Returns the number of activities fetched and the new cursor.
+    """
+    per_page = per_page or SYNC_PAGE_SIZE
+    state = await async_crud.get_strava_sync_state(db, user_id)
+    after = cursor = state.after if state is not None else 0
+    synced = 0
+    page = 1
+    while True:
+        # ``after`` stays fixed while paging; Strava pages relative to it
+        activities = await fetch_athlete_activities(token, page=page, per_page=per_page, after=after)
+        if activities:
+            await async_crud.store_strava_activities(db, user_id, activities)
+            synced += len(activities)
+            cursor = max(cursor, *(_epoch(activity["start_date"]) for activity in activities))
+        await async_crud.set_strava_sync_cursor(db, user_id, cursor)
+        if len(activities) < per_page:
+            return {"synced": synced, "after": cursor}
+        page += 1
@@ -0,0 +1,131 @@
+import multiprocessing
+import threading
+import uuid
+from datetime import datetime
+from queue import Empty
+from typing import Dict, Any, List, Optional
+
+# ``spawn`` gives the child a fresh interpreter: no inherited DB connections,
+# locks or threads from the web worker.
+_mp = multiprocessing.get_context("spawn")
+
+MAX_FINISHED_JOBS = 20
+
+
+class TrainingJobInProgress(RuntimeError):
+    """Raised when a training job is requested while another one is running."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Training job {job_id} is already running")
+        self.job_id = job_id
+
+
+def _run_training(queue, options: Dict[str, Any]) -> None:
+    """Entry point of the training process; reports back through ``queue``.
+
+    ``options`` are passed to ``train_models``, to ``search_models`` when
+    ``options["search"]`` is set, or to ``train_user_models`` when they name a
+    ``user_id``.
+    """
+    from app.services.ai_model import train_models, search_models, train_user_models
+
+    options = dict(options)
+    if options.pop("search", False):
+        run = search_models
+    elif "user_id" in options:
+        run = train_user_models
+    else:
+        run = train_models
+
+    def progress(model: str, epoch: int, epochs: int, loss: float) -> None:
+        queue.put({"type": "epoch", "model": model, "epoch": epoch, "epochs": epochs, "loss": loss})
+
+    try:
+        result = run(progress=progress, **options)
+    except RuntimeError as e:
+        # Known training issues such as insufficient data
+        queue.put({"type": "failed", "detail": str(e)})
+    except Exception as e:
+        queue.put({"type": "failed", "detail": f"Training failed: {e}"})
+    else:
+        queue.put({"type": "completed", "result": result})
+
+
+class TrainingJob:
+    def __init__(self, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.status = "running"
+        self.detail: Optional[str] = "Training started"
+        self.result: Optional[Dict[str, Any]] = None
+        self.progress: List[Dict[str, Any]] = []
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def _finish(self, status: str, detail: str, result: Optional[Dict[str, Any]] = None) -> None:
+        self.result = result
+        self.detail = detail
+        self.finished_at = datetime.utcnow()
+        # Set last so readers never see a finished status without its outcome
+        self.status = status
+
+
+class TrainingJobManager:
+    """Runs ``train_models`` (or ``search_models``) in a separate process, one job at a time.
+
+    Progress messages from the child are collected by a monitor thread so the
+    status endpoint only reads in-memory state.  Jobs and the one-at-a-time
+    rule therefore live in one web worker process: the API must run as a
+    single worker.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, **options: Any) -> TrainingJob:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "running":
+                    raise TrainingJobInProgress(job.id)
+            self._prune()
+            job = TrainingJob(options)
+            queue = _mp.Queue()
+            # Not a daemon: the hyperparameter search starts its own worker pool
+            process = _mp.Process(target=_run_training, args=(queue, options))
+            process.start()
+            self._jobs[job.id] = job
+        threading.Thread(target=self._monitor, args=(job, process, queue), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def _monitor(self, job: TrainingJob, process, queue) -> None:
+        while True:
+            try:
+                msg = queue.get(timeout=1)
+            except Empty:
+                if not process.is_alive():
+                    process.join()
+                    job._finish("failed", f"Training process exited with code {process.exitcode}")
+                    return
+                continue
+            if msg["type"] == "epoch":
+                job.progress.append({k: v for k, v in msg.items() if k != "type"})
+            elif msg["type"] == "completed":
+                job._finish("completed", "Model retrained successfully", msg["result"])
+                break
+            else:
+                job._finish("failed", msg["detail"])
+                break
+        process.join()
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status != "running"]
+        finished.sort(key=lambda j: j.created_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+            del self._jobs[job.id]
+
+
+training_jobs = TrainingJobManager()
@@ -14,9 +14,13 @@ os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
 # Assuming 'app' is the root package for the application code
 from app.main import app  # FastAPI app instance
 from app.database import SessionLocal, engine  # DB session factory
-from app.models import Base, Run as RunModel, User as UserModel  # SQLAlchemy models
+from app.models import (  # SQLAlchemy models
+    Base, Run as RunModel, User as UserModel, RunStatsRollup, RunVersion,
+    StravaHeartRateZoneCache, StravaStatsCache, StravaActivitiesCache, StravaActivity, StravaSyncState,
+)
 from app.schemas import RunCreate # Pydantic schema for creation
 from app.crud import create_run # CRUD function
+from app.services import ai_model
 
 # Ensure tables are created for the SQLite test database
 Base.metadata.create_all(bind=engine)
@@ -60,10 +64,10 @@ def db_session():
         db.close()
 
 @pytest.fixture(scope="function")
-def setup_run_in_db(db_session: Session):
+def setup_run_in_db(db_session: Session, test_user):
     """
-    Fixture to create a new Run record in the database with a unique name
-    and yield the created Run object.
+    Fixture to create a new Run record owned by ``test_user`` with a unique
+    name and yield the created Run object.
     No cleanup of the created run is performed in this simplified version.
     """
     unique_name = f"Test Run {uuid.uuid4()}"
@@ -74,7 +78,7 @@ def setup_run_in_db(db_session: Session):
         time=1800,
         average_speed=8.0
     )
-    created_run = create_run(db=db_session, run=run_create_data)
+    created_run = create_run(db=db_session, run=run_create_data, user_id=test_user.id)
     yield created_run
     # No explicit delete for simplicity in this iteration.
     # If needed, one could add:
@@ -97,6 +101,23 @@ def training_runs(db_session: Session):
     return runs
 
 
+@pytest.fixture()
+def model_paths(tmp_path, monkeypatch):
+    """Point the model artifacts at a temporary directory.
+
+    ``MODEL_DIR`` is also set for training jobs, which run in a spawned process.
+    """
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(ai_model, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(ai_model, "CLASSIF_PATH", str(tmp_path / "run_type_classifier.joblib"))
+    monkeypatch.setattr(ai_model, "REGRESS_PATH", str(tmp_path / "run_feature_regressor.joblib"))
+    monkeypatch.setattr(ai_model, "MODELS_NPZ_PATH", str(tmp_path / "run_models.npz"))
+    monkeypatch.setattr(ai_model, "USER_MODEL_DIR", str(tmp_path / "users"))
+    ai_model.user_models.clear()
+    yield tmp_path
+    ai_model.user_models.clear()
+
+
 @pytest.fixture()
 def test_user(db_session: Session):
     """Create a user for authentication tests."""
@@ -113,10 +134,25 @@ def test_user(db_session: Session):
     db_session.refresh(user)
     return user
 
+
+@pytest.fixture()
+def auth_headers(test_user):
+    """Bearer token headers for ``test_user``."""
+    from app.routers.auth import create_access_token
+
+    token = create_access_token({"sub": test_user.email})
+    return {"Authorization": f"Bearer {token}"}
+
 # Helper used by the autouse fixture to ensure a clean state
 def _clear_all_runs(db_session: Session) -> None:
-    """Remove all Run and User rows from the database."""
+    """Remove all Run, stats rollup, run version, Strava and User rows from the database."""
     db_session.query(RunModel).delete()
+    db_session.query(RunStatsRollup).delete()
+    db_session.query(RunVersion).delete()
+    for cache in (StravaHeartRateZoneCache, StravaStatsCache, StravaActivitiesCache):
+        db_session.query(cache).delete()
+    db_session.query(StravaActivity).delete()
+    db_session.query(StravaSyncState).delete()
     db_session.query(UserModel).delete()
     db_session.commit()
 
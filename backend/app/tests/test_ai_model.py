@@ -0,0 +1,315 @@
+import os
+import shutil
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.crud import create_run, insert_runs
+from app.schemas import RunBulkItem, RunCreate
+from sklearn.neural_network import MLPRegressor
+
+from app.services import ai_model, inference
+from app.services.ai_model import ModelRegistry, _atomic_dump
+
+
+def test_registry_loads_artifact_once(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    joblib.dump({"version": 1}, path)
+
+    calls = {"count": 0}
+
+    def counting_load(p):
+        calls["count"] += 1
+        return joblib.load(p)
+
+    registry = ModelRegistry(loader=counting_load)
+    first = registry.get(path)
+    second = registry.get(path)
+
+    assert first == {"version": 1}
+    assert first is second
+    assert calls["count"] == 1
+
+
+def test_registry_swaps_in_replaced_artifact(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    _atomic_dump({"version": 1}, path)
+
+    registry = ModelRegistry()
+    old = registry.get(path)
+
+    _atomic_dump({"version": 2}, path)
+    new = registry.get(path)
+
+    # A caller still holding the old package is unaffected by the swap
+    assert old == {"version": 1}
+    assert new == {"version": 2}
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+
+
+def _plain_file_mode(directory) -> int:
+    # The mode open() gives a new file under the current umask
+    reference = directory / "reference"
+    reference.write_bytes(b"")
+    return reference.stat().st_mode & 0o777
+
+
+def test_atomic_dump_uses_umask_mode(tmp_path):
+    path = str(tmp_path / "model.joblib")
+    _atomic_dump({"version": 1}, path)
+    assert os.stat(path).st_mode & 0o777 == _plain_file_mode(tmp_path)
+
+
+def test_registry_missing_artifact(tmp_path):
+    registry = ModelRegistry()
+    assert registry.get(str(tmp_path / "missing.joblib")) is None
+
+
+def _add_runs(db, name, distance, average_speed, count, user_id=None):
+    for _ in range(count):
+        create_run(db=db, run=RunCreate(
+            name=name,
+            distance=distance,
+            time=int(distance / average_speed * 3600),
+            average_speed=average_speed,
+        ), user_id=user_id)
+
+
+def test_incremental_training_uses_only_new_runs(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+
+    # Without saved models an incremental request falls back to a full retrain
+    first = ai_model.train_models(epochs=2, incremental=True)
+    assert first["mode"] == "full"
+    assert first["samples"] == 10
+
+    _add_runs(db_session, "Easy", 4.5, 9.0, 3)
+    update = ai_model.train_models(epochs=2, incremental=True)
+    assert update["mode"] == "incremental"
+    assert update["samples"] == 3
+
+    nothing_new = ai_model.train_models(epochs=2, incremental=True)
+    assert nothing_new == {"mode": "incremental", "samples": 0}
+
+
+
+def test_incremental_training_uses_imported_history(db_session, model_paths, test_user):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5, user_id=test_user.id)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5, user_id=test_user.id)
+    ai_model.train_models(epochs=2)
+
+    # Backfilled history is older than every run trained on so far
+    history = [
+        RunBulkItem(name="Easy", distance=4.2, time=1680, average_speed=9.0, created_at=datetime(2020, 1, day + 1))
+        for day in range(4)
+    ]
+    insert_runs(db_session, history, user_id=test_user.id)
+    db_session.commit()
+
+    update = ai_model.train_models(epochs=2, incremental=True)
+    assert update["mode"] == "incremental"
+    assert update["samples"] == 4
+
+
+def test_incremental_training_retrains_on_new_run_type(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+    ai_model.train_models(epochs=2)
+
+    _add_runs(db_session, "Intervals", 2.0, 14.0, 3)
+    summary = ai_model.train_models(epochs=2, incremental=True)
+    assert summary["mode"] == "full"
+    assert summary["samples"] == 13
+    assert "Interval" in joblib.load(ai_model.CLASSIF_PATH)["label_encoder"].classes_
+
+
+def test_vectorized_labels_match_row_wise_labeller():
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        "distance": rng.choice([0.0, 2.9, 3.0, 5.0, 7.5, 10.0, 10.1, 21.1], n),
+        "average_speed": rng.choice([0.0, 9.9, 10.0, 11.0, 12.0, 12.1, 15.0], n),
+        "name": rng.choice(["Morning Run", "INTERVALS", "hill interval", "", "Tempo"], n),
+    })
+    expected = df.apply(ai_model.assign_run_type_label, axis=1).tolist()
+    labels = ai_model.assign_run_type_labels(df["distance"], df["average_speed"], df["name"])
+    assert labels.tolist() == expected
+
+
+def test_heuristic_fallback_uses_vectorized_labels(monkeypatch, tmp_path):
+    monkeypatch.setattr(ai_model, "CLASSIF_PATH", str(tmp_path / "missing.joblib"))
+    monkeypatch.setattr(ai_model, "MODELS_NPZ_PATH", str(tmp_path / "missing.npz"))
+    features = [
+        {"distance": 12.0, "time": 4000, "average_speed": 10.8, "name": None},
+        {"distance": None, "time": None, "average_speed": None, "name": "Track intervals"},
+        {"distance": 2.0, "time": 500, "average_speed": 14.4},
+    ]
+    expected = [ai_model.assign_run_type_label(pd.Series(f)) for f in features]
+    assert ai_model.predict_run_types(features) == expected == ["Long Run", "Interval", "Interval"]
+
+
+def test_load_training_data_streams_in_chunks(db_session):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 7)
+    create_run(db=db_session, run=RunCreate(name="No time", distance=5.0, average_speed=9.0))
+    create_run(db=db_session, run=RunCreate(name=None, distance=6.0, time=2400, average_speed=9.0))
+
+    X, names, mark = ai_model.load_training_data(chunk_size=3)
+    assert X.shape == (8, 3)
+    # Newest first; incomplete runs are skipped and missing names become ""
+    assert X[0].tolist() == [6.0, 2400.0, 9.0]
+    assert names[0] == ""
+
+    X_limited, _, limited_mark = ai_model.load_training_data(limit=2, chunk_size=3)
+    assert X_limited.shape == (2, 3)
+    assert limited_mark == mark
+
+    X_after, _, after_mark = ai_model.load_training_data(after=mark)
+    assert X_after.shape == (0, 3)
+    assert after_mark is None
+
+
+def _forward_pass_features(pkg, run_type):
+    columns = pkg["onehot_columns"]
+    vec = np.zeros(len(columns))
+    if run_type in columns:
+        vec[columns.index(run_type)] = 1
+    out = pkg["target_scaler"].inverse_transform(pkg["model"].predict([vec]))[0]
+    return {"distance": float(out[0]), "time": int(out[1]), "average_speed": float(out[2])}
+
+
+def test_predict_run_features_served_from_table(db_session, model_paths, monkeypatch):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+    ai_model.train_models(epochs=2)
+    pkg = joblib.load(ai_model.REGRESS_PATH)
+
+    expected = {rt: _forward_pass_features(pkg, rt) for rt in ["Long Run", "Easy/Recovery Run", "Tempo Run"]}
+
+    def no_forward_pass(*args, **kwargs):
+        raise AssertionError("regressor should not run at request time")
+
+    ai_model.predict_run_features("Long Run")  # loads the models into the registry
+
+    monkeypatch.setattr(MLPRegressor, "predict", no_forward_pass)
+    monkeypatch.setattr(inference.MLP, "forward", no_forward_pass)
+    for run_type, features in expected.items():
+        assert ai_model.predict_run_features(run_type) == pytest.approx(features)
+
+
+def test_feature_table_added_to_old_artifacts(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+    ai_model.train_models(epochs=2)
+    pkg = joblib.load(ai_model.REGRESS_PATH)
+    del pkg["feature_table"]
+    joblib.dump(pkg, ai_model.REGRESS_PATH)
+    os.remove(ai_model.MODELS_NPZ_PATH)
+
+    assert ai_model.predict_run_features("Interval") == pytest.approx(_forward_pass_features(pkg, "Interval"))
+
+
+def test_numpy_engine_matches_sklearn(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 6)
+    _add_runs(db_session, "Long", 12.0, 10.0, 6)
+    _add_runs(db_session, "Tempo", 8.0, 11.0, 6)
+    _add_runs(db_session, "Intervals", 2.0, 14.0, 6)
+    ai_model.train_models(epochs=5)
+
+    clf_pkg = joblib.load(ai_model.CLASSIF_PATH)
+    reg_pkg = joblib.load(ai_model.REGRESS_PATH)
+    engine = inference.load_models(ai_model.MODELS_NPZ_PATH)
+    assert os.stat(ai_model.MODELS_NPZ_PATH).st_mode & 0o777 == _plain_file_mode(model_paths)
+
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.uniform(1, 25, 500), rng.uniform(300, 9000, 500), rng.uniform(6, 16, 500)])
+    X_df = pd.DataFrame(X, columns=ai_model.FEATURE_COLUMNS)
+    expected = clf_pkg["label_encoder"].inverse_transform(
+        clf_pkg["model"].predict(clf_pkg["scaler"].transform(X_df))
+    ).tolist()
+    assert engine.predict_run_types(X) == expected
+    assert ai_model.predict_run_types(X_df.to_dict("records")) == expected
+
+    for run_type in ["Interval", "Long Run", "Tempo Run", "Easy/Recovery Run", "Unknown"]:
+        assert engine.predict_run_features(run_type) == pytest.approx(_forward_pass_features(reg_pkg, run_type))
+
+
+def test_search_models_saves_best_candidates(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 6)
+    _add_runs(db_session, "Long", 12.0, 10.0, 6)
+    grid = {
+        "classifier": {"hidden_layer_sizes": [(5,), (10,)], "learning_rate_init": [0.01], "epochs": [2]},
+        "regressor": {"hidden_layer_sizes": [(5,)], "learning_rate_init": [0.01], "epochs": [2]},
+    }
+    progress = []
+    summary = ai_model.search_models(
+        grid=grid, budget_seconds=120, max_workers=2, progress=lambda *args: progress.append(args)
+    )
+
+    assert summary["mode"] == "search"
+    assert len(summary["candidates"]) == 3
+    assert all(c["epochs_trained"] == 2 for c in summary["candidates"])
+    assert {c["kind"] for c in summary["candidates"]} == {"classifier", "regressor"}
+    assert "val_accuracy" in summary["best"]["classifier"]
+    assert "val_mse" in summary["best"]["regressor"]
+    assert len(progress) == 3
+
+    best_clf = joblib.load(ai_model.CLASSIF_PATH)["model"]
+    assert best_clf.hidden_layer_sizes == summary["best"]["classifier"]["hidden_layer_sizes"]
+    assert os.path.exists(ai_model.MODELS_NPZ_PATH)
+
+
+def test_user_models_trained_on_own_runs(db_session, model_paths, test_user):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+    ai_model.train_models(epochs=2)
+
+    _add_runs(db_session, "Intervals", 2.0, 14.0, 4, user_id=test_user.id)
+    _add_runs(db_session, "Tempo", 8.0, 11.0, 4, user_id=test_user.id)
+    summary = ai_model.train_user_models(test_user.id, epochs=2, min_runs=8)
+    assert summary["mode"] == "user"
+    assert summary["samples"] == 8
+
+    personal = inference.load_models(ai_model.user_model_path(test_user.id))
+    assert set(personal.classes.tolist()) == {"Interval", "Tempo Run"}
+
+    features = [{"distance": 3.0, "time": 800, "average_speed": 13.5}]
+    X = np.array([[3.0, 800.0, 13.5]])
+    assert ai_model.predict_run_types(features, user_id=test_user.id) == personal.predict_run_types(X)
+    assert ai_model.predict_run_features("Interval", user_id=test_user.id) == personal.predict_run_features("Interval")
+
+    # Users without a personal model are served by the global one
+    global_engine = inference.load_models(ai_model.MODELS_NPZ_PATH)
+    assert ai_model.predict_run_types(features, user_id=test_user.id + 1) == global_engine.predict_run_types(X)
+
+
+def test_user_models_need_enough_runs(db_session, model_paths, test_user):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 3, user_id=test_user.id)
+    with pytest.raises(RuntimeError, match="Not enough runs"):
+        ai_model.train_user_models(test_user.id, epochs=2, min_runs=5)
+    assert not os.path.exists(ai_model.user_model_path(test_user.id))
+
+
+def test_user_model_cache_evicts_least_recently_used(db_session, model_paths):
+    _add_runs(db_session, "Easy", 4.0, 9.0, 5)
+    _add_runs(db_session, "Long", 12.0, 10.0, 5)
+    ai_model.train_models(epochs=2)
+    os.makedirs(ai_model.USER_MODEL_DIR)
+    for user_id in (1, 2, 3):
+        shutil.copy(ai_model.MODELS_NPZ_PATH, ai_model.user_model_path(user_id))
+
+    size = inference.load_models(ai_model.MODELS_NPZ_PATH).nbytes
+    cache = ai_model.UserModelCache(max_bytes=2 * size)
+    first = cache.get(1)
+    cache.get(2)
+    assert cache.get(1) is first  # 1 is now the most recently used
+    cache.get(3)
+
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * size
+    assert cache.get(1) is first
+    assert cache.get(4) is None
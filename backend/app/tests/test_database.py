@@ -0,0 +1,75 @@
+import logging
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, exc
+
+from app import database
+from app.routers import internal
+from app.database import PoolStats, create_instrumented_engine
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(async_client: AsyncClient, db_session, auth_headers, monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "secret")
+    db_session.close()  # give back the connection the fixtures used
+    await async_client.get("/runs", headers=auth_headers)  # async engine
+    await async_client.get("/runs/stats", headers=auth_headers)  # sync engine
+
+    response = await async_client.get("/internal/db/pool", headers={"X-Internal-Token": "wrong"})
+    assert response.status_code == 403
+    response = await async_client.get("/internal/db/pool", headers={"X-Internal-Token": "secret"})
+    assert response.status_code == 200
+    stats = response.json()
+    for name in ("sync", "async"):
+        assert stats[name]["checkouts"] >= 1
+        assert stats[name]["checked_out"] == 0
+        assert stats[name]["size"] == database.POOL_SIZE
+
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint_hidden_without_token(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", None)
+    response = await async_client.get("/internal/db/pool", headers={"X-Internal-Token": ""})
+    assert response.status_code == 404
+
+
+def test_pool_checkout_timeout_is_recorded(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(database, "SLOW_CHECKOUT_SECONDS", 0.05)
+    stats = PoolStats("test")
+    engine = create_instrumented_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", stats, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+
+    with engine.connect():
+        snapshot = stats.snapshot(engine.pool)
+        assert snapshot["checked_out"] == 1
+        with caplog.at_level(logging.WARNING, logger="app.database"):
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        assert "test pool checkout waited" in caplog.text
+
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["connects"] == 1
+    assert snapshot["checkouts"] == snapshot["checkins"] == 1
+    assert snapshot["timeouts"] == snapshot["slow_checkouts"] == 1
+    assert snapshot["wait_ms_max"] >= 100
+    assert snapshot["checked_out"] == 0
+    engine.dispose()
+
+
+def test_opening_a_connection_is_not_waiting(tmp_path):
+    stats = PoolStats("test")
+    engine = create_instrumented_engine(f"sqlite:///{tmp_path / 'pool.db'}", stats, pool_size=1, max_overflow=0)
+    event.listen(engine, "connect", lambda *args: time.sleep(0.2))
+
+    with engine.connect():
+        pass
+
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["connects"] == 1
+    assert snapshot["wait_ms_max"] < 100
+    assert snapshot["slow_checkouts"] == 0
+    engine.dispose()
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import pytest
 from httpx import AsyncClient
 from datetime import datetime, timezone
@@ -7,8 +9,11 @@ from datetime import datetime, timezone
 
 # Import schemas for validation if necessary, e.g., RunResponse
 from app.schemas import RunResponse
-from app.models import Run as RunModel # For type hinting the fixture if needed
-from app.database import SessionLocal # For direct DB manipulation if a test needs to clear data
+from app.models import Run as RunModel, User as UserModel # For type hinting the fixture if needed
+from app.database import SessionLocal, engine # For direct DB manipulation if a test needs to clear data
+from app import crud
+from app.schemas import RunBulkItem
+from app.services.training_jobs import TrainingJob, training_jobs
 
 # Helper function to clear runs (use with extreme caution, ideally for a test DB)
 def _clear_all_runs(db_session):
@@ -21,7 +26,7 @@ def _clear_all_runs(db_session):
 
 
 @pytest.mark.asyncio
-async def test_create_run_from_last_no_previous_run(async_client: AsyncClient):
+async def test_create_run_from_last_no_previous_run(async_client: AsyncClient, auth_headers):
     # This test assumes the database has no runs.
     # For a real test suite, ensure the DB is cleared or use a dedicated test DB.
     # We can try to clear it here, but it's not ideal for shared dev DB.
@@ -30,26 +35,26 @@ async def test_create_run_from_last_no_previous_run(async_client: AsyncClient):
     # _clear_all_runs(temp_db) # Risky for shared dev DB
     # temp_db.close()
 
-    response = await async_client.post("/runs/new-from-last")
+    response = await async_client.post("/runs/new-from-last", headers=auth_headers)
     assert response.status_code == 404
     assert response.json() == {"detail": "No previous runs found to copy from."}
 
 @pytest.mark.asyncio
-async def test_get_last_run_no_run(async_client: AsyncClient):
+async def test_get_last_run_no_run(async_client: AsyncClient, auth_headers):
     # Similar to the test above, this assumes no runs in the DB.
     # temp_db = SessionLocal()
     # _clear_all_runs(temp_db) # Risky
     # temp_db.close()
 
-    response = await async_client.get("/runs/last")
+    response = await async_client.get("/runs/last", headers=auth_headers)
     assert response.status_code == 404
     assert response.json() == {"detail": "No previous runs found."}
 
 @pytest.mark.asyncio
-async def test_create_run_from_last_with_previous_run(async_client: AsyncClient, setup_run_in_db: RunModel):
+async def test_create_run_from_last_with_previous_run(async_client: AsyncClient, setup_run_in_db: RunModel, auth_headers):
     previous_run = setup_run_in_db # This run is created by the fixture
 
-    response = await async_client.post("/runs/new-from-last")
+    response = await async_client.post("/runs/new-from-last", headers=auth_headers)
     assert response.status_code == 200
     
     new_run_data = response.json()
@@ -66,7 +71,7 @@ async def test_create_run_from_last_with_previous_run(async_client: AsyncClient,
     assert new_run_created_at >= previous_run_created_at
 
 @pytest.mark.asyncio
-async def test_get_last_run_with_run(async_client: AsyncClient, setup_run_in_db: RunModel):
+async def test_get_last_run_with_run(async_client: AsyncClient, setup_run_in_db: RunModel, auth_headers):
     # The setup_run_in_db fixture ensures a run exists.
     # Since the fixture creates a new unique run, it should be the last one.
     # However, if other tests run in parallel or leave data, this might not be strictly true
@@ -75,7 +80,7 @@ async def test_get_last_run_with_run(async_client: AsyncClient, setup_run_in_db:
     
     expected_run = setup_run_in_db
 
-    response = await async_client.get("/runs/last")
+    response = await async_client.get("/runs/last", headers=auth_headers)
     assert response.status_code == 200
     
     last_run_data = response.json()
@@ -111,7 +116,7 @@ async def test_network_custom_plan_interval(async_client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_run_predict_includes_training_plan(async_client: AsyncClient):
+async def test_run_predict_includes_training_plan(async_client: AsyncClient, auth_headers):
     plan = {"segments": [{"segment": "500m", "pace": "14 km/h"}]}
     req = {
         "name": "Planned",
@@ -120,16 +125,40 @@ async def test_run_predict_includes_training_plan(async_client: AsyncClient):
         "average_speed": 10,
         "training_plan": plan,
     }
-    response = await async_client.post("/runs/predict", json=req)
+    response = await async_client.post("/runs/predict", headers=auth_headers, json=req)
     assert response.status_code == 200
     resp = response.json()
     assert resp["settings_snapshot"]["training_plan"] == plan
 
 
+async def _wait_for_training_job(async_client: AsyncClient, job_id: str, headers: dict, timeout: float = 120) -> dict:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        resp = await async_client.get(f"/network/train/{job_id}", headers=headers)
+        assert resp.status_code == 200
+        job = resp.json()
+        if job["status"] != "running":
+            return job
+        await asyncio.sleep(0.2)
+    raise AssertionError(f"Training job {job_id} did not finish in {timeout}s")
+
+
 @pytest.mark.asyncio
-async def test_train_then_custom_plan(async_client: AsyncClient, training_runs):
+async def test_train_then_custom_plan(async_client: AsyncClient, training_runs, model_paths, auth_headers):
     resp = await async_client.post("/network/train")
-    assert resp.status_code == 200
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    # Only one training job may run at a time
+    second = await async_client.post("/network/train")
+    assert second.status_code == 409
+
+    assert (await async_client.get(f"/network/train/{job_id}")).status_code == 401
+    job = await _wait_for_training_job(async_client, job_id, auth_headers)
+    assert job["status"] == "completed", job["detail"]
+    assert {p["model"] for p in job["progress"]} == {"classifier", "regressor"}
+    assert len(job["progress"]) == 2 * job["progress"][0]["epochs"]
 
     response = await async_client.post(
         "/network/plan/custom",
@@ -140,3 +169,239 @@ async def test_train_then_custom_plan(async_client: AsyncClient, training_runs):
     assert data["run_type"] == "Easy/Recovery Run"
     assert isinstance(data["training_plan"], dict)
     assert "pace" in data["training_plan"]
+
+
+@pytest.mark.asyncio
+async def test_training_job_not_found(async_client: AsyncClient, auth_headers):
+    resp = await async_client.get("/network/train/does-not-exist", headers=auth_headers)
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_personal_training_job_hidden_from_other_users(async_client: AsyncClient, test_user, auth_headers, monkeypatch):
+    other_job = TrainingJob({"user_id": test_user.id + 1})
+    own_job = TrainingJob({"user_id": test_user.id})
+    monkeypatch.setitem(training_jobs._jobs, other_job.id, other_job)
+    monkeypatch.setitem(training_jobs._jobs, own_job.id, own_job)
+
+    assert (await async_client.get(f"/network/train/{other_job.id}", headers=auth_headers)).status_code == 404
+    assert (await async_client.get(f"/network/train/{own_job.id}", headers=auth_headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_run_predict_batch_creates_planned_runs(async_client: AsyncClient, auth_headers):
+    req = {
+        "runs": [
+            {"name": "Long one", "distance": 15, "time": 5400, "average_speed": 10},
+            {"name": "Short one", "distance": 4, "time": 1500, "average_speed": 9.6},
+            {"name": "With plan", "distance": 5, "time": 1500, "average_speed": 12,
+             "training_plan": {"segments": []}},
+        ]
+    }
+    response = await async_client.post("/runs/predict/batch", headers=auth_headers, json=req)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["name"] for r in data] == ["Long one", "Short one", "With plan"]
+    assert len({r["id"] for r in data}) == 3
+    assert all(r["status"] == "planned" for r in data)
+    assert all(r["settings_snapshot"]["predicted_run_type"] == r["predicted_run_type"] for r in data)
+    assert data[2]["training_plan"] == {"segments": []}
+
+    planned = await async_client.get("/runs/planned", headers=auth_headers)
+    assert {r["id"] for r in planned.json()} == {r["id"] for r in data}
+
+
+@pytest.mark.asyncio
+async def test_runs_keyset_pagination(async_client: AsyncClient, db_session, test_user, auth_headers):
+    same_time = datetime(2024, 5, 1, 8, 0)
+    for i in range(5):
+        # Three runs share a timestamp so the id tiebreaker is exercised
+        created_at = same_time if i < 3 else datetime(2024, 5, 1 + i, 8, 0)
+        db_session.add(RunModel(name=f"Run {i}", created_at=created_at, distance=5.0, user_id=test_user.id))
+    db_session.add(RunModel(name="Planned", created_at=same_time, status="planned", user_id=test_user.id))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await async_client.get("/runs", headers=auth_headers, params=params)
+        assert response.status_code == 200
+        seen += [r["id"] for r in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    all_runs = (await async_client.get("/runs", headers=auth_headers)).json()
+    assert seen == [r["id"] for r in all_runs]
+    assert len(seen) == 6
+    # skip/limit keeps working
+    assert [r["id"] for r in (await async_client.get("/runs", headers=auth_headers, params={"skip": 2, "limit": 2})).json()] == seen[2:4]
+
+    planned = await async_client.get("/runs/planned", headers=auth_headers, params={"limit": 1})
+    assert [r["name"] for r in planned.json()] == ["Planned"]
+    after_last = await async_client.get("/runs/planned", headers=auth_headers, params={"cursor": planned.headers["X-Next-Cursor"]})
+    assert after_last.json() == []
+    assert "X-Next-Cursor" not in after_last.headers
+
+    assert (await async_client.get("/runs", headers=auth_headers, params={"cursor": "not-a-cursor"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_runs_reports_row_errors(async_client: AsyncClient, db_session, auth_headers):
+    rows = [
+        {"name": "Old run", "distance": 10.0, "time": 3600, "average_speed": 10.0,
+         "created_at": "2023-06-01T07:00:00"},
+        {"name": "Bad distance", "distance": "far"},
+        {"name": "Planned", "distance": 5.0, "status": "planned"},
+    ]
+    response = await async_client.post("/runs/bulk", headers=auth_headers, json=rows)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["created"]) == 2
+    assert [e["index"] for e in data["errors"]] == [1]
+    assert data["errors"][0]["errors"][0]["loc"] == ["distance"]
+
+    old = db_session.get(RunModel, data["created"][0])
+    assert old.name == "Old run" and old.created_at.year == 2023
+    assert db_session.get(RunModel, data["created"][1]).status == "planned"
+    stats = (await async_client.get("/runs/stats", headers=auth_headers, params={"granularity": "year"})).json()
+    assert stats["yearly"]["2023"] == {"count": 1, "total_distance": 10.0}
+
+    atomic = await async_client.post("/runs/bulk", headers=auth_headers, params={"atomic": "true"}, json=rows)
+    assert atomic.status_code == 422
+    assert [e["index"] for e in atomic.json()["detail"]] == [1]
+    assert db_session.query(RunModel).count() == 2
+
+    assert (await async_client.post("/runs/bulk", headers=auth_headers, json={"name": "not a list"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_runs_from_ndjson(async_client: AsyncClient, db_session, monkeypatch, auth_headers):
+    import app.main as main_module
+
+    monkeypatch.setattr(main_module, "BULK_BATCH_SIZE", 2)
+    lines = [json.dumps({"name": f"Run {i}", "distance": float(i)}) for i in range(5)]
+    lines.insert(3, "{not json")
+    body = ("\n".join(lines) + "\n").encode()
+
+    async def chunks():
+        # Split mid-line to exercise reassembly across chunks
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    response = await async_client.post(
+        "/runs/bulk", content=chunks(), headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [e["index"] for e in data["errors"]] == [3]
+    assert data["errors"][0]["errors"][0]["type"] == "json_invalid"
+    names = [db_session.get(RunModel, run_id).name for run_id in data["created"]]
+    assert names == [f"Run {i}" for i in range(5)]
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="the COPY path only runs on Postgres")
+def test_bulk_insert_copy_returns_ids_in_row_order(db_session, test_user):
+    # Out of created_at order, so neither timestamps nor names line up with insertion by accident
+    runs = [
+        RunBulkItem(name=f"Run {i}", distance=float(i), created_at=datetime(2024, 1, 1 + (i * 7) % 28, tzinfo=timezone.utc))
+        for i in range(500)
+    ]
+    ids = crud.insert_runs(db_session, runs, user_id=test_user.id)
+    db_session.commit()
+
+    assert ids == sorted(ids)
+    assert [db_session.get(RunModel, run_id).name for run_id in ids] == [run.name for run in runs]
+
+
+@pytest.mark.asyncio
+async def test_export_runs_streams_ndjson_and_csv(async_client: AsyncClient, db_session, monkeypatch, test_user, auth_headers):
+    import app.main as main_module
+
+    monkeypatch.setattr(main_module, "EXPORT_CHUNK_SIZE", 2)
+    for i in range(5):
+        db_session.add(RunModel(
+            name=f"Run {i}", created_at=datetime(2024, 1, 1 + i, 7, 0), distance=float(i), user_id=test_user.id,
+            settings_snapshot={"shoe": "Hoka"} if i == 0 else None,
+        ))
+    db_session.commit()
+
+    response = await async_client.get("/runs/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["name"] for r in rows] == [f"Run {i}" for i in range(5)]
+    assert rows[0]["settings_snapshot"] == {"shoe": "Hoka"}
+    assert rows[0]["status"] == "completed"
+    assert RunResponse.model_validate(rows[0]).created_at == datetime(2024, 1, 1, 7, 0)
+
+    csv_response = await async_client.get("/runs/export", headers=auth_headers, params={"format": "csv"})
+    assert csv_response.headers["content-disposition"] == 'attachment; filename="runs.csv"'
+    lines = csv_response.text.splitlines()
+    assert lines[0].split(",")[:3] == ["id", "name", "created_at"]
+    assert len(lines) == 6
+    assert lines[1].endswith('"{""shoe"": ""Hoka""}"')
+
+    assert (await async_client.get("/runs/export", headers=auth_headers, params={"format": "xml"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_runs_are_scoped_to_their_owner(async_client: AsyncClient, db_session, setup_run_in_db, auth_headers):
+    from app.routers.auth import create_access_token
+
+    other = UserModel(email="other@example.com", hashed_password="-")
+    db_session.add(other)
+    db_session.commit()
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': other.email})}"}
+
+    assert (await async_client.get("/runs", headers=other_headers)).json() == []
+    assert (await async_client.get("/runs/last", headers=other_headers)).status_code == 404
+    stats = (await async_client.get("/runs/stats", headers=other_headers)).json()
+    assert stats["yearly"] == {}
+
+    own = (await async_client.get("/runs", headers=auth_headers)).json()
+    assert [r["id"] for r in own] == [setup_run_in_db.id]
+    assert sum(b["count"] for b in (await async_client.get("/runs/stats", headers=auth_headers)).json()["yearly"].values()) == 1
+
+    assert (await async_client.get("/runs")).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_only_check_the_run_version(async_client: AsyncClient, setup_run_in_db, auth_headers):
+    from sqlalchemy import event
+    from app.database import async_engine, engine
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    for url in ("/runs/last", "/runs", "/runs/stats"):
+        first = await async_client.get(url, headers=auth_headers)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            statements.clear()
+            cached = await async_client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        finally:
+            for target in (engine, async_engine.sync_engine):
+                event.remove(target, "before_cursor_execute", record)
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        # The token's user lookup, then the version check; runs and the rollup are never read
+        assert len(statements) == 2
+        assert "FROM users" in statements[0]
+        assert "FROM run_versions" in statements[1]
+
+        since = await async_client.get(url, headers={**auth_headers, "If-Modified-Since": first.headers["Last-Modified"]})
+        assert since.status_code == 304
+
+    new_run = await async_client.post("/runs/new-from-last", headers=auth_headers)
+    changed = await async_client.get("/runs/last", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["id"] == new_run.json()["id"]
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def work():
+        calls.append(1)
+        await release.wait()
+        return {"value": len(calls)}
+
+    waiters = [asyncio.ensure_future(flights.do("key", work)) for _ in range(5)]
+    other = asyncio.ensure_future(flights.do("other", work))
+    await asyncio.sleep(0)
+    assert flights.in_flight("key")
+
+    # A caller going away does not cancel the call for the rest
+    waiters[0].cancel()
+    release.set()
+    results = await asyncio.gather(*waiters[1:])
+    await other
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert not flights.in_flight("key")
+
+    # The key is free again once the call finished
+    await flights.do("key", work)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    flights = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -1,12 +1,16 @@
 import pytest
 from httpx import AsyncClient
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 
+from sqlalchemy.dialects import postgresql
+
+from app import crud
 from app.models import Run, RunStatus
 from app.database import SessionLocal
+from app.schemas import RunBulkItem, RunCreate
 
 @pytest.mark.asyncio
-async def test_stats_totals(async_client: AsyncClient, db_session: SessionLocal):
+async def test_stats_totals(async_client: AsyncClient, db_session: SessionLocal, test_user, auth_headers):
     runs = [
         (datetime(2023, 12, 31, 10, 0, 0), 5.0),
         (datetime(2024, 1, 1, 10, 0, 0), 8.0),
@@ -17,6 +21,7 @@ async def test_stats_totals(async_client: AsyncClient, db_session: SessionLocal)
         db_session.add(
             Run(
                 name="Seeded Run",
+                user_id=test_user.id,
                 created_at=dt,
                 distance=dist,
                 time=1000,
@@ -27,7 +32,7 @@ async def test_stats_totals(async_client: AsyncClient, db_session: SessionLocal)
         )
     db_session.commit()
 
-    response = await async_client.get("/runs/stats")
+    response = await async_client.get("/runs/stats", headers=auth_headers)
     assert response.status_code == 200
     stats = response.json()
 
@@ -41,3 +46,132 @@ async def test_stats_totals(async_client: AsyncClient, db_session: SessionLocal)
 
     assert stats["yearly"]["2023"] == {"count": 1, "total_distance": 5.0}
     assert stats["yearly"]["2024"] == {"count": 3, "total_distance": 18.0}
+
+
+@pytest.mark.asyncio
+async def test_stats_empty_and_missing_distance(async_client: AsyncClient, db_session: SessionLocal, test_user, auth_headers):
+    response = await async_client.get("/runs/stats", headers=auth_headers)
+    assert response.json() == {"daily": {}, "weekly": {}, "monthly": {}, "yearly": {}}
+
+    # Runs late and early on the same day share one daily bucket; a missing distance counts as 0
+    for dt, dist in [(datetime(2024, 3, 4, 0, 5), None), (datetime(2024, 3, 4, 23, 55), 4.5)]:
+        db_session.add(Run(name="Seeded Run", user_id=test_user.id, created_at=dt, distance=dist, status=RunStatus.COMPLETED))
+    db_session.commit()
+
+    stats = (await async_client.get("/runs/stats", headers=auth_headers)).json()
+    assert stats["weekly"] == {"2024-W10": {"count": 2, "total_distance": 4.5}}
+    assert stats["monthly"] == {"2024-03": {"count": 2, "total_distance": 4.5}}
+    assert stats["yearly"] == {"2024": {"count": 2, "total_distance": 4.5}}
+
+
+def test_stats_rollup_maintained_on_insert(db_session: SessionLocal, test_user):
+    first = crud.create_run(db_session, RunCreate(name="Easy", distance=5.0), user_id=test_user.id)
+    crud.create_run_from_previous(db_session, first)
+    crud.create_runs(db_session, [RunCreate(name="Plan", distance=2.5), RunCreate(name="Plan")], user_id=test_user.id)
+    # Runs without an owner are not part of any user's stats
+    crud.create_run(db_session, RunCreate(name="Orphan", distance=1.0))
+
+    stats = crud.get_run_stats(db_session, test_user.id)
+    day = first.created_at.date()
+    assert stats["yearly"] == {str(day.year): {"count": 4, "total_distance": 12.5}}
+    assert sum(b["count"] for b in stats["weekly"].values()) == 4
+
+    # A rebuild from the runs table gives the same rollup
+    assert crud.rebuild_stats_rollup(db_session) == sum(len(buckets) for buckets in stats.values())
+    assert crud.get_run_stats(db_session, test_user.id) == stats
+
+
+
+def test_stats_days_are_utc_days(db_session: SessionLocal, test_user):
+    # 23:30 on 29 February at UTC-2 is already 1 March in UTC
+    late_evening = datetime(2024, 2, 29, 23, 30, tzinfo=timezone(timedelta(hours=-2)))
+    crud.insert_runs(db_session, [RunBulkItem(name="Late", distance=5.0, created_at=late_evening)], user_id=test_user.id)
+    db_session.commit()
+
+    stats = crud.get_run_stats(db_session, test_user.id)
+    assert stats["monthly"] == {"2024-03": {"count": 1, "total_distance": 5.0}}
+    assert crud.get_daily_run_totals(db_session, test_user.id) == [(date(2024, 3, 1), 1, 5.0)]
+    assert crud.get_daily_run_totals(db_session, test_user.id, end=date(2024, 2, 29)) == []
+    crud.rebuild_stats_rollup(db_session)
+    assert crud.get_run_stats(db_session, test_user.id) == stats
+
+    # On Postgres date() of a timestamptz would use the session time zone
+    sql = str(crud._daily_totals().compile(dialect=postgresql.dialect()))
+    assert "date(timezone('UTC', runs.created_at))" in sql
+
+
+def test_stats_read_from_rollup_only(db_session: SessionLocal, test_user):
+    crud.create_run(db_session, RunCreate(name="Easy", distance=5.0), user_id=test_user.id)
+    # Bulk deletes bypass the ORM, so the rollup still reports the run until rebuilt
+    db_session.query(Run).delete()
+    db_session.commit()
+    assert crud.get_run_stats(db_session, test_user.id)["yearly"] != {}
+
+    crud.rebuild_stats_rollup(db_session)
+    assert crud.get_run_stats(db_session, test_user.id) == {"weekly": {}, "monthly": {}, "yearly": {}}
+
+
+@pytest.mark.asyncio
+async def test_stats_range_and_granularity(async_client: AsyncClient, db_session: SessionLocal, test_user, auth_headers):
+    for dt, dist in [
+        (datetime(2024, 1, 31, 23, 0), 2.0),
+        (datetime(2024, 2, 1, 6, 0), 4.0),
+        (datetime(2024, 2, 1, 18, 0), 6.0),
+        (datetime(2024, 2, 29, 12, 0), 8.0),
+        (datetime(2024, 3, 1, 0, 0), 10.0),
+    ]:
+        db_session.add(Run(name="Seeded Run", user_id=test_user.id, created_at=dt, distance=dist, status=RunStatus.COMPLETED))
+    db_session.commit()
+
+    response = await async_client.get("/runs/stats", headers=auth_headers, params={"from": "2024-02-01", "to": "2024-02-29", "granularity": ["day", "month"]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "daily": {
+            "2024-02-01": {"count": 2, "total_distance": 10.0},
+            "2024-02-29": {"count": 1, "total_distance": 8.0},
+        },
+        "weekly": {},
+        "monthly": {"2024-02": {"count": 3, "total_distance": 18.0}},
+        "yearly": {},
+    }
+
+    # Without a range only the requested rollup periods are returned
+    yearly = (await async_client.get("/runs/stats", headers=auth_headers, params={"granularity": "year"})).json()
+    assert yearly == {"daily": {}, "weekly": {}, "monthly": {}, "yearly": {"2024": {"count": 5, "total_distance": 30.0}}}
+
+    open_ended = (await async_client.get("/runs/stats", headers=auth_headers, params={"from": "2024-02-29", "granularity": "week"})).json()
+    assert open_ended["weekly"] == {"2024-W09": {"count": 2, "total_distance": 18.0}}
+
+    bad_range = await async_client.get("/runs/stats", headers=auth_headers, params={"from": "2024-03-01", "to": "2024-02-01"})
+    assert bad_range.status_code == 400
+    bad_granularity = await async_client.get("/runs/stats", headers=auth_headers, params={"granularity": "hour"})
+    assert bad_granularity.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stats_rollup_maintained_by_async_inserts(db_session: SessionLocal, test_user):
+    from app import async_crud
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        first = await async_crud.create_run(db, RunCreate(name="Easy", distance=5.0), user_id=test_user.id)
+        await async_crud.create_run_from_previous(db, first)
+        assert (await async_crud.get_last_run(db, test_user.id)).copied_from == first.id
+
+    yearly = crud.get_run_stats(db_session, test_user.id, periods=["yearly"])["yearly"]
+    assert yearly == {str(first.created_at.year): {"count": 2, "total_distance": 10.0}}
+
+
+def test_claim_unowned_runs(db_session: SessionLocal, test_user):
+    for distance in (3.0, 4.0):
+        crud.create_run(db_session, RunCreate(name="Before ownership", distance=distance))
+    assert crud.get_runs(db_session, test_user.id) == []
+    version = crud.get_run_version(db_session, test_user.id)
+
+    assert crud.claim_unowned_runs(db_session, test_user.id) == 2
+    assert len(crud.get_runs(db_session, test_user.id)) == 2
+    yearly = crud.get_run_stats(db_session, test_user.id, periods=["yearly"])["yearly"]
+    assert [bucket["count"] for bucket in yearly.values()] == [2]
+    assert crud.get_run_version(db_session, test_user.id) != version
+    assert crud.claim_unowned_runs(db_session, test_user.id) == 0
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services.strava import athlete, client
+
+
+@pytest.fixture()
+def strava_api(monkeypatch):
+    """Route the shared Strava client to an in-process handler with canned responses by path."""
+    api = SimpleNamespace(requests=[], responses={})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        api.requests.append(request)
+        status, body = api.responses.get(request.url.path, (404, {"message": "Record Not Found"}))
+        return httpx.Response(status, json=body)
+
+    fake = httpx.AsyncClient(base_url=client.STRAVA_API_URL, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(client, "_client", fake)
+    return api
+
+
+@pytest.mark.asyncio
+async def test_fetchers_share_one_client(strava_api):
+    strava_api.responses["/api/v3/athlete/zones"] = (200, {"heart_rate": {"zones": []}})
+    strava_api.responses["/api/v3/activities/42"] = (200, {"id": 42})
+    strava_api.responses["/api/v3/athlete/activities"] = (200, [{"id": 1, "type": "Ride"}, {"id": 2, "type": "Run"}])
+
+    assert await athlete.fetch_athlete_zones("tok") == {"heart_rate": {"zones": []}}
+    assert await athlete.fetch_activity_details(42, "tok", include_all_efforts=False) == {"id": 42}
+    assert (await athlete.fetch_latest_run("tok", after=1700000000))["id"] == 2
+
+    assert [r.headers["Authorization"] for r in strava_api.requests] == ["Bearer tok"] * 3
+    assert strava_api.requests[1].url.params["include_all_efforts"] == "false"
+    assert strava_api.requests[2].url.params["after"] == "1700000000"
+    assert client.get_client() is client._client
+
+
+@pytest.mark.asyncio
+async def test_fetch_errors_raise(strava_api):
+    with pytest.raises(httpx.HTTPStatusError):
+        await athlete.fetch_athlete_stats("tok", 7)
+
+    strava_api.responses["/api/v3/athlete/activities"] = (200, [{"id": 1, "type": "Ride"}])
+    with pytest.raises(RuntimeError, match="No recent run"):
+        await athlete.fetch_latest_run("tok")
+
+
+@pytest.mark.asyncio
+async def test_client_is_recreated_after_close(monkeypatch):
+    monkeypatch.setattr(client, "_client", None)
+    first = client.get_client()
+    assert client.get_client() is first
+    assert first.timeout.connect == client.CONNECT_TIMEOUT
+    assert first.timeout.read == client.READ_TIMEOUT
+
+    await client.close_client()
+    assert first.is_closed
+    second = client.get_client()
+    assert second is not first
+    await client.close_client()
@@ -1,6 +1,11 @@
+import asyncio
+from datetime import timedelta
+
 import pytest
 from httpx import AsyncClient
+from app.models import StravaHeartRateZoneCache, StravaStatsCache
 from app.routers import strava as strava_router
+from app.services.strava import cache as strava_cache
 
 @pytest.mark.asyncio
 async def test_zones_cached(async_client: AsyncClient, test_user, monkeypatch):
@@ -11,7 +16,7 @@ async def test_zones_cached(async_client: AsyncClient, test_user, monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_fetch(token):
+    async def fake_fetch(token):
         calls["count"] += 1
         return {"zones": "live"}
 
@@ -22,7 +27,7 @@ async def test_zones_cached(async_client: AsyncClient, test_user, monkeypatch):
     assert resp1.json() == {"zones": "live"}
     assert calls["count"] == 1
 
-    def fail_fetch(token):
+    async def fail_fetch(token):
         raise RuntimeError("should not fetch again")
 
     monkeypatch.setattr(strava_router, "fetch_athlete_zones", fail_fetch)
@@ -42,7 +47,7 @@ async def test_stats_cached(async_client: AsyncClient, test_user, monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_fetch(token, athlete_id):
+    async def fake_fetch(token, athlete_id):
         calls["count"] += 1
         return {"stats": "live"}
 
@@ -53,7 +58,7 @@ async def test_stats_cached(async_client: AsyncClient, test_user, monkeypatch):
     assert resp1.json() == {"stats": "live"}
     assert calls["count"] == 1
 
-    def fail_fetch(token, athlete_id):
+    async def fail_fetch(token, athlete_id):
         raise RuntimeError("should not fetch again")
 
     monkeypatch.setattr(strava_router, "fetch_athlete_stats", fail_fetch)
@@ -73,7 +78,7 @@ async def test_activities_cached(async_client: AsyncClient, test_user, monkeypat
 
     calls = {"count": 0}
 
-    def fake_fetch(token, page=1, per_page=30):
+    async def fake_fetch(token, page=1, per_page=30):
         calls["count"] += 1
         return ["activity"]
 
@@ -84,7 +89,7 @@ async def test_activities_cached(async_client: AsyncClient, test_user, monkeypat
     assert resp1.json() == ["activity"]
     assert calls["count"] == 1
 
-    def fail_fetch(token, page=1, per_page=30):
+    async def fail_fetch(token, page=1, per_page=30):
         raise RuntimeError("should not fetch again")
 
     monkeypatch.setattr(strava_router, "fetch_athlete_activities", fail_fetch)
@@ -94,3 +99,64 @@ async def test_activities_cached(async_client: AsyncClient, test_user, monkeypat
     assert resp2.json() == ["activity"]
     assert calls["count"] == 1
 
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_one_refresh_runs(async_client: AsyncClient, db_session, test_user, monkeypatch):
+    data = {"username": test_user.email, "password": "admin"}
+    token_resp = await async_client.post("/auth/token", data=data)
+    headers = {"Authorization": f"Bearer {token_resp.json()['access_token']}"}
+
+    calls = {"count": 0}
+    release = asyncio.Event()
+
+    async def slow_fetch(token, athlete_id):
+        calls["count"] += 1
+        if calls["count"] > 1:
+            await release.wait()
+        return {"stats": calls["count"]}
+
+    monkeypatch.setattr(strava_router, "fetch_athlete_stats", slow_fetch)
+    first = await async_client.get("/strava/athlete/stats", headers=headers)
+    assert first.json() == {"stats": 1}
+
+    # Everything is stale from now on; readers get the old entry without waiting
+    monkeypatch.setitem(strava_cache.CACHE_TTLS, "stats", timedelta(0))
+    for _ in range(3):
+        resp = await async_client.get("/strava/athlete/stats", headers=headers)
+        assert resp.json() == {"stats": 1}
+    assert calls["count"] == 2
+    assert len(strava_cache._refreshes) == 1
+
+    release.set()
+    await asyncio.gather(*strava_cache._refreshes.values())
+    assert not strava_cache._refreshes
+
+    # The refresh replaced the entry in place
+    rows = db_session.query(StravaStatsCache).filter(StravaStatsCache.user_id == test_user.id).all()
+    assert [row.data for row in rows] == [{"stats": 2}]
+    monkeypatch.setitem(strava_cache.CACHE_TTLS, "stats", timedelta(hours=1))
+    assert (await async_client.get("/strava/athlete/stats", headers=headers)).json() == {"stats": 2}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_misses_make_one_upstream_call(async_client: AsyncClient, db_session, test_user, monkeypatch):
+    data = {"username": test_user.email, "password": "admin"}
+    token_resp = await async_client.post("/auth/token", data=data)
+    headers = {"Authorization": f"Bearer {token_resp.json()['access_token']}"}
+
+    calls = {"count": 0}
+
+    async def slow_fetch(token):
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"zones": "live"}
+
+    monkeypatch.setattr(strava_router, "fetch_athlete_zones", slow_fetch)
+    responses = await asyncio.gather(
+        *(async_client.get("/strava/athlete/zones", headers=headers) for _ in range(10))
+    )
+    assert [r.status_code for r in responses] == [200] * 10
+    assert all(r.json() == {"zones": "live"} for r in responses)
+    assert calls["count"] == 1
+    assert db_session.query(StravaHeartRateZoneCache).count() == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from app.models import StravaActivity
+from app.services.strava import details as strava_details
+from app.services.strava import sync as strava_sync
+from app.tests.test_strava_sync import FakeStrava, _activity
+
+
+def _status_error(status: int, headers=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://www.strava.com/api/v3/activities/1")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+@pytest.mark.asyncio
+async def test_detail_backfill_is_concurrent_retried_and_resumable(
+    async_client: AsyncClient, db_session, test_user, auth_headers, monkeypatch
+):
+    activities = [_activity(i) for i in range(6)]
+    monkeypatch.setattr(strava_sync, "fetch_athlete_activities", FakeStrava(activities).fetch)
+    await async_client.post("/strava/activities/sync", headers=auth_headers)
+    ids = [a["id"] for a in activities]
+
+    attempts = {}
+    running = {"now": 0, "max": 0}
+    gone = ids[4]
+
+    async def fake_details(activity_id, token, include_all_efforts=True):
+        attempts[activity_id] = attempts.get(activity_id, 0) + 1
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            await asyncio.sleep(0.01)
+            if activity_id == gone:
+                raise _status_error(404)
+            if activity_id == ids[0] and attempts[activity_id] == 1:
+                raise _status_error(429, {"Retry-After": "0"})
+            if activity_id == ids[1] and attempts[activity_id] < 3:
+                raise _status_error(503)
+            return {"id": activity_id, "segment_efforts": []}
+        finally:
+            running["now"] -= 1
+
+    monkeypatch.setattr(strava_details, "fetch_activity_details", fake_details)
+    monkeypatch.setattr(strava_details, "DETAIL_CONCURRENCY", 2)
+    monkeypatch.setattr(strava_details, "RETRY_BASE_DELAY", 0)
+
+    response = await async_client.post("/strava/activities/details", headers=auth_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert sorted(result["fetched"]) == sorted(set(ids) - {gone})
+    assert list(result["failed"]) == [str(gone)]
+    assert result["remaining"] == 1
+    assert running["max"] == 2
+    assert attempts[ids[0]] == 2 and attempts[ids[1]] == 3
+    assert attempts[gone] == 1  # a 404 is not retried
+
+    stored = db_session.get(StravaActivity, (test_user.id, ids[1]))
+    assert stored.details == {"id": ids[1], "segment_efforts": []}
+    assert stored.details_fetched_at is not None
+
+    # A second run only retries what is still missing
+    requested = []
+
+    async def back_again(activity_id, token, include_all_efforts=True):
+        requested.append(activity_id)
+        return {"id": activity_id}
+
+    monkeypatch.setattr(strava_details, "fetch_activity_details", back_again)
+    resumed = (await async_client.post("/strava/activities/details", headers=auth_headers)).json()
+    assert requested == [gone]
+    assert resumed["fetched"] == [gone] and resumed["remaining"] == 0
+
+    # Explicit ids re-fetch, but only the user's own activities
+    explicit = await async_client.post(
+        "/strava/activities/details", headers=auth_headers, json={"activity_ids": [ids[2], 123]}
+    )
+    assert explicit.json()["fetched"] == [ids[2]]
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_after_max(monkeypatch):
+    calls = []
+
+    async def always_busy(activity_id, token, include_all_efforts=True):
+        calls.append(activity_id)
+        raise _status_error(502)
+
+    monkeypatch.setattr(strava_details, "fetch_activity_details", always_busy)
+    monkeypatch.setattr(strava_details, "RETRY_BASE_DELAY", 0)
+    with pytest.raises(httpx.HTTPStatusError):
+        await strava_details.fetch_details_with_retry(7, "tok")
+    assert len(calls) == strava_details.DETAIL_MAX_RETRIES + 1
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app import crud
+from app.services.strava import sync as strava_sync
+
+
+def _activity(i: int, sport_type: str = "Run") -> dict:
+    start = datetime(2024, 1, 1, 7, 0, tzinfo=timezone.utc) + timedelta(days=i)
+    return {
+        "id": 9_000_000_000 + i,  # Strava ids exceed 32 bits
+        "name": f"Activity {i}",
+        "sport_type": sport_type,
+        "start_date": start.isoformat().replace("+00:00", "Z"),
+        "distance": 5000.0 + i,
+        "moving_time": 1500,
+    }
+
+
+class FakeStrava:
+    """Serves ``activities`` like Strava: with ``after`` set, oldest first in pages."""
+
+    def __init__(self, activities):
+        self.activities = activities
+        self.calls = []
+        self.fail_on_page = None
+
+    async def fetch(self, token, page=1, per_page=30, after=None, before=None):
+        self.calls.append({"page": page, "after": after})
+        if page == self.fail_on_page:
+            raise RuntimeError("connection reset")
+        newer = sorted(
+            (a for a in self.activities if strava_sync._epoch(a["start_date"]) > after),
+            key=lambda a: a["start_date"],
+        )
+        return newer[(page - 1) * per_page:page * per_page]
+
+
+@pytest.mark.asyncio
+async def test_activity_sync_is_incremental(async_client: AsyncClient, auth_headers, monkeypatch):
+    strava = FakeStrava([_activity(i, "Ride" if i == 2 else "Run") for i in range(5)])
+    monkeypatch.setattr(strava_sync, "fetch_athlete_activities", strava.fetch)
+    monkeypatch.setattr(strava_sync, "SYNC_PAGE_SIZE", 2)
+
+    first = await async_client.post("/strava/activities/sync", headers=auth_headers)
+    assert first.status_code == 200
+    assert first.json() == {"synced": 5, "after": strava_sync._epoch(_activity(4)["start_date"])}
+    assert strava.calls == [{"page": 1, "after": 0}, {"page": 2, "after": 0}, {"page": 3, "after": 0}]
+
+    # Only activities newer than the cursor are requested later
+    strava.activities.append(_activity(5))
+    strava.calls.clear()
+    second = (await async_client.post("/strava/activities/sync", headers=auth_headers)).json()
+    assert second["synced"] == 1
+    assert strava.calls == [{"page": 1, "after": first.json()["after"]}]
+
+    listed = (await async_client.get("/strava/activities", headers=auth_headers)).json()
+    assert [a["name"] for a in listed] == [f"Activity {i}" for i in (5, 4, 3, 2, 1, 0)]
+    assert listed[0]["id"] == 9_000_000_005
+
+    runs = await async_client.get(
+        "/strava/activities",
+        headers=auth_headers,
+        params={"sport_type": "Run", "from": "2024-01-02", "to": "2024-01-04"},
+    )
+    assert [a["name"] for a in runs.json()] == ["Activity 3", "Activity 1"]
+
+
+@pytest.mark.asyncio
+async def test_interrupted_sync_resumes(async_client: AsyncClient, auth_headers, monkeypatch):
+    strava = FakeStrava([_activity(i) for i in range(5)])
+    strava.fail_on_page = 2
+    monkeypatch.setattr(strava_sync, "fetch_athlete_activities", strava.fetch)
+    monkeypatch.setattr(strava_sync, "SYNC_PAGE_SIZE", 2)
+
+    with pytest.raises(RuntimeError):
+        await async_client.post("/strava/activities/sync", headers=auth_headers)
+    assert len((await async_client.get("/strava/activities", headers=auth_headers)).json()) == 2
+
+    strava.fail_on_page = None
+    strava.calls.clear()
+    resumed = (await async_client.post("/strava/activities/sync", headers=auth_headers)).json()
+    assert resumed["synced"] == 3
+    assert strava.calls[0]["after"] == strava_sync._epoch(_activity(1)["start_date"])
+    assert len((await async_client.get("/strava/activities", headers=auth_headers)).json()) == 5
+
+
+def test_strava_timestamps_parse_without_python_311_isoformat(monkeypatch):
+    class Py310Datetime(datetime):
+        @classmethod
+        def fromisoformat(cls, value):
+            # Python 3.10 rejects the "Z" suffix Strava uses
+            if value.endswith("Z"):
+                raise ValueError(f"Invalid isoformat string: {value!r}")
+            return datetime.fromisoformat(value)
+
+    monkeypatch.setattr(crud, "datetime", Py310Datetime)
+    parsed = crud.parse_strava_datetime("2018-02-16T14:52:54Z")
+    assert parsed == datetime(2018, 2, 16, 14, 52, 54, tzinfo=timezone.utc)
+    assert strava_sync._epoch("2018-02-16T14:52:54Z") == int(parsed.timestamp())
+    assert crud._strava_activity_row(1, _activity(0))["start_date"] == datetime(2024, 1, 1, 7, 0, tzinfo=timezone.utc)
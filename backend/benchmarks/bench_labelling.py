@@ -0,0 +1,53 @@
+"""Compare row-wise and vectorized run-type labelling.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_labelling [sizes...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# The labellers never touch the database; avoid needing a reachable one
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.ai_model import assign_run_type_label, assign_run_type_labels
+
+NAMES = ["Morning Run", "Evening Jog", "Lunch Break Run", "Weekend Long Run", "Speed Work", "Track Intervals"]
+
+
+def make_runs(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    distance = rng.uniform(1.0, 20.0, n).round(2)
+    time_s = rng.integers(300, 7200, n)
+    return pd.DataFrame({
+        "distance": distance,
+        "time": time_s,
+        "average_speed": (distance / (time_s / 3600.0)).round(2),
+        "name": rng.choice(NAMES, n),
+    })
+
+
+def bench(n: int) -> None:
+    df = make_runs(n)
+
+    start = time.perf_counter()
+    row_wise = df.apply(assign_run_type_label, axis=1)
+    row_wise_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = assign_run_type_labels(df["distance"], df["average_speed"], df["name"])
+    vectorized_s = time.perf_counter() - start
+
+    assert (row_wise.to_numpy() == vectorized).all(), "labellers disagree"
+    print(f"{n:>9,} rows  apply: {row_wise_s:8.3f}s  vectorized: {vectorized_s:7.4f}s  "
+          f"speedup: {row_wise_s / vectorized_s:6.0f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,101 @@
+"""Compare joblib/sklearn and NumPy-export model loading and prediction latency.
+
+Trains models shaped like ``train_models`` on synthetic runs, saves both
+artifact formats to a temp directory and times loading and single-run
+prediction.  Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_model_loading
+"""
+import os
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neural_network import MLPClassifier, MLPRegressor
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services import inference
+from app.services.ai_model import FEATURE_COLUMNS, _one_hot, assign_run_type_labels
+from benchmarks.bench_labelling import make_runs
+
+
+def timed(fn, repeat: int) -> float:
+    """Return the mean seconds per call of ``fn`` over ``repeat`` calls."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def build_artifacts(directory: str):
+    df = make_runs(5000)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+    labels = assign_run_type_labels(df["distance"], df["average_speed"], df["name"])
+
+    le = LabelEncoder().fit(labels)
+    scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    clf = MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=20, random_state=42)
+    clf.fit(scaler.transform(pd.DataFrame(X, columns=FEATURE_COLUMNS)), le.transform(labels))
+    clf_pkg = {"model": clf, "scaler": scaler, "label_encoder": le}
+
+    columns = np.unique(labels).tolist()
+    target_scaler = StandardScaler().fit(X)
+    reg = MLPRegressor(hidden_layer_sizes=(50, 25), max_iter=20, random_state=42)
+    reg.fit(_one_hot(labels, columns), target_scaler.transform(X))
+    reg_pkg = {"model": reg, "target_scaler": target_scaler, "onehot_columns": columns}
+
+    paths = {
+        "classifier": os.path.join(directory, "run_type_classifier.joblib"),
+        "regressor": os.path.join(directory, "run_feature_regressor.joblib"),
+        "npz": os.path.join(directory, "run_models.npz"),
+    }
+    joblib.dump(clf_pkg, paths["classifier"])
+    joblib.dump(reg_pkg, paths["regressor"])
+    inference.export_models(clf_pkg, reg_pkg, paths["npz"])
+    return paths
+
+
+def sklearn_predict(clf_pkg, reg_pkg, features):
+    Xs = clf_pkg["scaler"].transform(pd.DataFrame([features], columns=FEATURE_COLUMNS))
+    run_type = clf_pkg["label_encoder"].inverse_transform(clf_pkg["model"].predict(Xs))[0]
+    columns = reg_pkg["onehot_columns"]
+    vec = np.zeros(len(columns))
+    vec[columns.index(run_type)] = 1
+    return reg_pkg["target_scaler"].inverse_transform(reg_pkg["model"].predict([vec]))[0]
+
+
+def numpy_predict(engine, features):
+    run_type = engine.predict_run_types(np.array([[features[c] for c in FEATURE_COLUMNS]], dtype=float))[0]
+    return engine.predict_run_features(run_type)
+
+
+def main() -> None:
+    warnings.simplefilter("ignore")  # short fits raise ConvergenceWarning
+    features = {"distance": 8.0, "time": 2700, "average_speed": 10.7}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_artifacts(directory)
+        sizes = {name: os.path.getsize(path) for name, path in paths.items()}
+
+        load_sklearn = timed(lambda: (joblib.load(paths["classifier"]), joblib.load(paths["regressor"])), 50)
+        load_numpy = timed(lambda: inference.load_models(paths["npz"]), 50)
+
+        clf_pkg, reg_pkg = joblib.load(paths["classifier"]), joblib.load(paths["regressor"])
+        engine = inference.load_models(paths["npz"])
+        call_sklearn = timed(lambda: sklearn_predict(clf_pkg, reg_pkg, features), 500)
+        call_numpy = timed(lambda: numpy_predict(engine, features), 500)
+
+    print(f"artifact size  joblib: {(sizes['classifier'] + sizes['regressor']) / 1024:7.1f} KiB  "
+          f"npz: {sizes['npz'] / 1024:7.1f} KiB")
+    print(f"load           joblib: {load_sklearn * 1e3:7.2f} ms   npz: {load_numpy * 1e3:7.2f} ms  "
+          f"({load_sklearn / load_numpy:.1f}x)")
+    print(f"predict (1 run) sklearn: {call_sklearn * 1e6:7.1f} us  numpy: {call_numpy * 1e6:7.1f} us  "
+          f"({call_sklearn / call_numpy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare the old Python loop behind ``/runs/stats`` with SQL aggregation
+and with reading the ``run_stats_rollup`` table.
+
+Seeds a throwaway SQLite database (or the database in ``BENCH_DATABASE_URL``)
+with runs spread over several years. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_stats [sizes...]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.models import Base, Run, RunStatus, User
+
+YEARS = 8
+USER_ID = 1
+BATCH = 50_000
+
+
+def seed(engine, n: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    start = datetime(2018, 1, 1)
+    offsets = rng.integers(0, YEARS * 365 * 24 * 3600, n)
+    distances = rng.uniform(1.0, 20.0, n).round(2)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": USER_ID, "email": "bench@example.com", "hashed_password": "-"}])
+        for lo in range(0, n, BATCH):
+            rows = [
+                {
+                    "name": "Morning Run",
+                    "user_id": USER_ID,
+                    "created_at": start + timedelta(seconds=int(offsets[i])),
+                    "distance": float(distances[i]),
+                    "time": 1800,
+                    "average_speed": 10.0,
+                    "status": RunStatus.COMPLETED,
+                    "settings_snapshot": {"shoes": "daily trainer"},
+                }
+                for i in range(lo, min(lo + BATCH, n))
+            ]
+            conn.execute(insert(Run), rows)
+            crud.add_to_stats_rollup(conn, [(USER_ID, row["created_at"], row["distance"]) for row in rows])
+
+
+def python_stats(db) -> dict:
+    """The previous implementation: load every run and bucket it in Python."""
+    stats = {"weekly": {}, "monthly": {}, "yearly": {}}
+    for run in crud.get_runs(db=db, user_id=USER_ID, limit=None):
+        keys = {
+            "weekly": f"{run.created_at.isocalendar().year}-W{run.created_at.isocalendar().week:02d}",
+            "monthly": f"{run.created_at.year}-{run.created_at.month:02d}",
+            "yearly": str(run.created_at.year),
+        }
+        for period, key in keys.items():
+            bucket = stats[period].setdefault(key, {"count": 0, "total_distance": 0.0})
+            bucket["count"] += 1
+            bucket["total_distance"] += run.distance if run.distance else 0.0
+    return stats
+
+
+def sql_stats(db) -> dict:
+    """GROUP BY day in the database, rolled up in Python."""
+    stats = {"weekly": {}, "monthly": {}, "yearly": {}}
+    for (period, key), (count, total) in crud._stats_rollup_deltas(crud.get_daily_run_totals(db, USER_ID)).items():
+        stats[period][key] = {"count": count, "total_distance": total}
+    return stats
+
+
+def _timed(fn, db):
+    start = time.perf_counter()
+    result = fn(db)
+    return result, time.perf_counter() - start
+
+
+def bench(url: str, n: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    seed(engine, n)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        expected, python_s = _timed(python_stats, db)
+    with Session() as db:
+        grouped, sql_s = _timed(sql_stats, db)
+    with Session() as db:
+        rollup, rollup_s = _timed(lambda db: crud.get_run_stats(db, USER_ID), db)
+
+    for actual in (grouped, rollup):
+        for period in expected:
+            assert expected[period].keys() == actual[period].keys(), "bucket keys differ"
+            for key, bucket in expected[period].items():
+                assert bucket["count"] == actual[period][key]["count"]
+                assert abs(bucket["total_distance"] - actual[period][key]["total_distance"]) < 1e-6
+    print(f"{n:>9,} runs  python loop: {python_s:8.3f}s  sql group by: {sql_s:7.3f}s  "
+          f"rollup: {rollup_s:7.4f}s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    url = os.environ.get("BENCH_DATABASE_URL")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            bench(url or f"sqlite:///{tmp}/bench_stats.db", size)
@@ -19,6 +19,7 @@ import axios from "axios";
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 import CreateRunForm from "@/components/forms/CreateRunForm";
 import styles from "./CreateRun.module.css"; // Import CSS module
+import { authHeaders } from "@/utils/auth";
 
 // 1. Define Run Interface
 interface Run {
@@ -46,7 +47,9 @@ export default function CreateRunPage() {
       setIsLoadingLastRun(true);
       setFetchError(null);
       try {
-        const response = await axios.get<Run>(`${API_BASE_URL}/runs/last`);
+        const response = await axios.get<Run>(`${API_BASE_URL}/runs/last`, {
+          headers: authHeaders(),
+        });
         setLastRun(response.data);
       } catch (error) {
         if (axios.isAxiosError(error) && error.response?.status === 404) {
@@ -86,11 +89,15 @@ export default function CreateRunPage() {
   const acceptPlan = async () => {
     if (!plan) return;
     try {
-      await axios.post(`${API_BASE_URL}/runs/predict`, {
-        name: "Planned Run",
-        distance,
-        training_plan: plan.training_plan,
-      });
+      await axios.post(
+        `${API_BASE_URL}/runs/predict`,
+        {
+          name: "Planned Run",
+          distance,
+          training_plan: plan.training_plan,
+        },
+        { headers: authHeaders() },
+      );
       setPlan(null);
     } catch (e) {
       console.error(e);
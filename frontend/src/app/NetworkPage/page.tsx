@@ -14,6 +14,7 @@ import {
   Stack,
 } from "@mantine/core";
 import { notifications } from "@mantine/notifications";
+import { authHeaders } from "../../utils/auth";
 
 const API = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -68,8 +69,18 @@ export default function NetworkPage() {
     setModelMsg(null);
     try {
       const res = await fetch(`${API}/network/train`, { method: "POST" });
-      const j = await res.json();
+      let j = await res.json();
       if (!res.ok) throw new Error(j.detail || "Unknown error");
+      // Training runs in the background; poll the job until it finishes
+      while (j.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const statusRes = await fetch(`${API}/network/train/${j.job_id}`, {
+          headers: authHeaders(),
+        });
+        j = await statusRes.json();
+        if (!statusRes.ok) throw new Error(j.detail || "Unknown error");
+      }
+      if (j.status !== "completed") throw new Error(j.detail || "Unknown error");
       setModelMsg(j.detail);
       notifications.show({
         title: "Model Updated",
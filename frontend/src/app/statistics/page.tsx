@@ -28,6 +28,7 @@ import {
   Bar,
 } from "recharts";
 import dynamic from "next/dynamic";
+import { authHeaders } from "../../utils/auth";
 
 const IconAlertCircle = dynamic(
   () => import("@tabler/icons-react").then((mod) => mod.IconAlertCircle),
@@ -78,7 +79,7 @@ export default function StatisticsPage() {
     // Fetch completed runs
     setLoadingCompletedRuns(true);
     setErrorCompletedRuns(null);
-    fetch(`${API_BASE_URL}/runs`) // This endpoint now returns completed runs
+    fetch(`${API_BASE_URL}/runs`, { headers: authHeaders() }) // This endpoint now returns completed runs
       .then(async (response) => {
         if (!response.ok) {
           const errorData = await response
@@ -108,7 +109,7 @@ export default function StatisticsPage() {
     // Fetch planned runs
     setLoadingPlannedRuns(true);
     setErrorPlannedRuns(null);
-    fetch(`${API_BASE_URL}/runs/planned`)
+    fetch(`${API_BASE_URL}/runs/planned`, { headers: authHeaders() })
       .then(async (response) => {
         if (!response.ok) {
           const errorData = await response
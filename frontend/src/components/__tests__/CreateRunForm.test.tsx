@@ -77,6 +77,7 @@ describe("CreateRunForm", () => {
       expect(mockedAxios.post).toHaveBeenCalledWith(
         `${baseUrl}/runs/new-from-last`,
         {},
+        { headers: {} },
       );
       expect(button).not.toBeDisabled(); // Button should be re-enabled
     });
@@ -114,6 +115,7 @@ describe("CreateRunForm", () => {
       expect(mockedAxios.post).toHaveBeenCalledWith(
         `${baseUrl}/runs/new-from-last`,
         {},
+        { headers: {} },
       );
       expect(button).not.toBeDisabled(); // Button should be re-enabled
     });
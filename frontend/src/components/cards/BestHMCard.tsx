@@ -4,6 +4,7 @@ import { Loader, Text } from "@mantine/core";
 import { useEffect, useState } from "react";
 import MetricCard from "../cards/MetricCard";
 import { formatTime } from "../../utils/time";
+import { authHeaders } from "../../utils/auth";
 
 interface Run {
   distance?: number | null;
@@ -18,7 +19,7 @@ export default function BestHMCard() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    fetch(`${API_BASE_URL}/runs?limit=1000`)
+    fetch(`${API_BASE_URL}/runs?limit=1000`, { headers: authHeaders() })
       .then((r) => {
         if (!r.ok) throw new Error("Failed to fetch runs");
         return r.json();
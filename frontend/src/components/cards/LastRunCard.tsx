@@ -5,6 +5,7 @@ import { useEffect, useState } from "react";
 import MetricCard from "../cards/MetricCard";
 import { formatTime } from "../../utils/time";
 import dynamic from "next/dynamic";
+import { authHeaders } from "../../utils/auth";
 
 const IconRun = dynamic(
   () => import("@tabler/icons-react").then((m) => m.IconRun),
@@ -41,7 +42,7 @@ export default function LastRunCard() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    fetch(`${API_BASE_URL}/runs/last`)
+    fetch(`${API_BASE_URL}/runs/last`, { headers: authHeaders() })
       .then(async (r) => {
         if (!r.ok) {
           const data = await r
@@ -4,6 +4,7 @@ import { Loader, Text } from "@mantine/core";
 import { useEffect, useState } from "react";
 import MetricCard from "../cards/MetricCard";
 import { getCurrentWeekKey } from "../../utils/time";
+import { authHeaders } from "../../utils/auth";
 
 interface StatDetail {
   count: number;
@@ -22,7 +23,9 @@ export default function RunsThisWeekCard() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    fetch(`${API_BASE_URL}/runs/stats`)
+    fetch(`${API_BASE_URL}/runs/stats?granularity=week`, {
+      headers: authHeaders(),
+    })
       .then((r) => {
         if (!r.ok) throw new Error("Failed to fetch stats");
         return r.json();
@@ -3,6 +3,7 @@
 import { Loader, Text } from "@mantine/core";
 import { useEffect, useState } from "react";
 import MetricCard from "../cards/MetricCard";
+import { authHeaders } from "../../utils/auth";
 
 interface StatDetail {
   count: number;
@@ -21,7 +22,9 @@ export default function TotalKmCard() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    fetch(`${API_BASE_URL}/runs/stats`)
+    fetch(`${API_BASE_URL}/runs/stats?granularity=year`, {
+      headers: authHeaders(),
+    })
       .then((r) => {
         if (!r.ok) throw new Error("Failed to fetch stats");
         return r.json();
@@ -5,6 +5,7 @@ import globalStyles from '@/styles/global.module.css';
 import { TextInput, Button, Stack, Text, Box } from '@mantine/core';
 import { notifications } from '@mantine/notifications';
 import axios from 'axios';
+import { authHeaders } from "../../utils/auth";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -29,6 +30,7 @@ export default function CreateRunForm() {
       const response = await axios.post<RunResponse>(
         `${API_BASE_URL}/runs/new-from-last`,
         {},
+        { headers: authHeaders() },
       );
 
       notifications.show({
@@ -1,9 +1,13 @@
 import React from "react";
-import { render, waitFor } from "@testing-library/react-native";
+import { render, fireEvent, waitFor } from "@testing-library/react-native";
 import StatisticsScreen from "../screens/StatisticsScreen";
 import { Provider as PaperProvider } from "react-native-paper";
 import { ThemeProvider } from "../ThemeContext";
 
+jest.mock("@react-native-async-storage/async-storage", () => ({
+  getItem: jest.fn(() => Promise.resolve("token")),
+}));
+
 it("renders statistics screen", async () => {
   jest
     .spyOn(global, "fetch" as any)
@@ -26,6 +30,31 @@ it("renders statistics screen", async () => {
   await waitFor(() => getByText("Run Statistics"));
 
   expect(getByText("Run Statistics")).toBeTruthy();
+  await waitFor(() => expect(global.fetch).toHaveBeenCalledTimes(2));
+  for (const [, init] of (global.fetch as jest.Mock).mock.calls) {
+    expect(init.headers).toEqual({ Authorization: "Bearer token" });
+  }
+
+  (global.fetch as jest.Mock).mockRestore();
+});
+
+it("asks to sign in when the runs need a login", async () => {
+  jest
+    .spyOn(global, "fetch" as any)
+    .mockResolvedValue({ ok: false, status: 401 } as any);
+  const navigation = { replace: jest.fn(), navigate: jest.fn() } as any;
+
+  const { getByText } = render(
+    <PaperProvider>
+      <ThemeProvider>
+        <StatisticsScreen navigation={navigation} />
+      </ThemeProvider>
+    </PaperProvider>,
+  );
+  await waitFor(() => getByText("Please sign in to see your runs."));
+
+  fireEvent.press(getByText("Sign in"));
+  expect(navigation.replace).toHaveBeenCalledWith("Login");
 
   (global.fetch as jest.Mock).mockRestore();
 });
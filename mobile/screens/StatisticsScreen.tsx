@@ -5,6 +5,9 @@ import { lightColors, darkColors } from "../theme";
 import { useTheme } from "react-native-paper";
 import { ThemeContext } from "../ThemeContext";
 import Svg, { Polyline, Rect } from "react-native-svg";
+import { NativeStackScreenProps } from "@react-navigation/native-stack";
+import PrimaryButton from "../components/PrimaryButton";
+import { authHeaders } from "../services/auth";
 import styles from "../styles/StatisticsScreenStyles";
 
 const API_BASE_URL = process.env.EXPO_PUBLIC_API_URL || "http://localhost:8000";
@@ -36,7 +39,9 @@ function formatTime(seconds: Optional<number>): string {
   return `${m.toString().padStart(2, "0")}:${s.toString().padStart(2, "0")}`;
 }
 
-export default function StatisticsScreen() {
+type Props = Partial<NativeStackScreenProps<any>>;
+
+export default function StatisticsScreen({ navigation }: Props) {
   // Use theme context or fallback to lightColors
   const { colors: themeColorsFromContext, isDark } = useContext(ThemeContext) || {};
   const colors = isDark ? darkColors : lightColors;
@@ -45,22 +50,29 @@ export default function StatisticsScreen() {
   const [completedRuns, setCompletedRuns] = useState<Run[]>([]);
   const [plannedRuns, setPlannedRuns] = useState<Run[]>([]);
   const [loading, setLoading] = useState(true);
+  const [signedOut, setSignedOut] = useState(false);
+  const [error, setError] = useState("");
 
   useEffect(() => {
     async function fetchRuns() {
       try {
+        const headers = await authHeaders();
         const [completedResp, plannedResp] = await Promise.all([
-          fetch(`${API_BASE_URL}/runs`),
-          fetch(`${API_BASE_URL}/runs/planned`),
+          fetch(`${API_BASE_URL}/runs`, { headers }),
+          fetch(`${API_BASE_URL}/runs/planned`, { headers }),
         ]);
-        if (completedResp.ok) {
-          setCompletedRuns(await completedResp.json());
+        if (completedResp.status === 401 || plannedResp.status === 401) {
+          setSignedOut(true);
+          return;
         }
-        if (plannedResp.ok) {
-          setPlannedRuns(await plannedResp.json());
+        if (!completedResp.ok || !plannedResp.ok) {
+          throw new Error("Failed to fetch runs");
         }
+        setCompletedRuns(await completedResp.json());
+        setPlannedRuns(await plannedResp.json());
       } catch (e) {
         console.error("failed to fetch runs", e);
+        setError("Could not load your runs.");
       } finally {
         setLoading(false);
       }
@@ -125,10 +137,26 @@ export default function StatisticsScreen() {
       totalDistance: parseFloat(item.totalDistance.toFixed(2)),
     }));
 
+  if (signedOut) {
+    return (
+      <View style={[styles.root, { backgroundColor: colors.background }]}>
+        <View style={styles.container}>
+          <Text style={[styles.title, { color: colors.foreground }]}>Run Statistics</Text>
+          <Text style={[styles.error, { color: colors.error }]}>
+            Please sign in to see your runs.
+          </Text>
+          <PrimaryButton title="Sign in" onPress={() => navigation?.replace("Login")} />
+        </View>
+        <BottomNavBar />
+      </View>
+    );
+  }
+
   return (
     <View style={[styles.root, { backgroundColor: colors.background }]}>
       <ScrollView contentContainerStyle={[styles.container, { backgroundColor: colors.background }]}>
         <Text style={[styles.title, { color: colors.foreground }]}>Run Statistics</Text>
+        {error ? <Text style={[styles.error, { color: colors.error }]}>{error}</Text> : null}
 
         <Text style={styles.sectionTitle}>Average Speed per Month</Text>
         <LineChart data={monthlyAvgSpeedData} accent={accent} />
@@ -0,0 +1,7 @@
+import AsyncStorage from "@react-native-async-storage/async-storage";
+
+/** Authorization header for the token LoginScreen stored, if any. */
+export async function authHeaders(): Promise<Record<string, string>> {
+  const token = await AsyncStorage.getItem("token");
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
@@ -28,6 +28,10 @@ export default StyleSheet.create({
     flex: 1,
     fontSize: 12,
   },
+  error: {
+    marginVertical: spacing.sm,
+    textAlign: 'center',
+  },
   chart: {
     alignSelf: 'center',
   },